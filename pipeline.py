@@ -1,18 +1,296 @@
+import collections
 import json
+import logging
+import multiprocessing
 import random
 import concurrent
 import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
 from os import cpu_count
 from pathlib import Path
 from collections import Counter
 from typing import Any, Callable, List, Dict, Optional, Tuple, Iterator, Literal
 from warnings import warn
-from tqdm.notebook import tqdm
+
+try:  # sérialisation JSON plus rapide si disponible (optionnel)
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 MODES = ('one_input', 'zip', 'modulo', 'sample', 'custom')
+# Rafraîchissement de la barre de progression (s) : pour des éléments traités en < 1 ms,
+# redessiner à chaque élément coûte plus cher que le traitement lui-même
+_PROGRESS_INTERVAL = 0.5
+EXECUTORS = ('process', 'thread')
+# Sentinelle pour `next(iterator, _MISSING)` : un élément peut légitimement valoir None
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_tqdm() -> Callable:
+    """Import paresseux de tqdm (variante notebook ou console selon l'environnement, via tqdm.auto).
+    tqdm.auto interroge IPython/ipywidgets : coût payé au premier `run()` et non à l'import du module.
+    """
+    from tqdm.auto import tqdm
+    return tqdm
+
+
+# Redirection des logs vers tqdm partagée par les threads (voir `_redirect_logging`)
+_redirect_lock = threading.Lock()
+_redirect_depth = 0
+_redirect_context: Optional[contextlib.AbstractContextManager] = None
+
+
+@contextlib.contextmanager
+def _redirect_logging() -> Iterator[None]:
+    """`logging_redirect_tqdm` entré une seule fois quel que soit le nombre d'étapes en cours.
+    `logging_redirect_tqdm` remplace `root.handlers` sans verrou : deux threads qui l'entrent en même temps
+    restaurent chacun la liste de l'autre (handler tqdm laissé sur le logger racine). Ici le premier entrant
+    installe la redirection et le dernier sortant la retire ; les étapes lancées par le pipeline (qui l'entre
+    autour de ses threads) ne la réinstallent pas.
+    """
+    global _redirect_depth, _redirect_context
+    with _redirect_lock:
+        if _redirect_depth == 0:
+            from tqdm.contrib.logging import logging_redirect_tqdm
+            _redirect_context = logging_redirect_tqdm()
+            _redirect_context.__enter__()
+        _redirect_depth += 1
+    try:
+        yield
+    finally:
+        with _redirect_lock:
+            _redirect_depth -= 1
+            if _redirect_depth == 0:
+                _redirect_context.__exit__(None, None, None)
+                _redirect_context = None
+
+
+# Dossiers déjà créés (ou vérifiés) dans ce processus, ancêtres compris
+_ensured_dirs: set = set()
+
+
+def _ensure_dir(path: str) -> None:
+    """Crée un dossier (et ses parents) une seule fois par processus.
+    Les appels suivants avec le même chemin, ou l'un de ses parents, ne font aucun appel système.
+    """
+    if path in _ensured_dirs:
+        return
+    # os.makedirs directement : pas de construction de Path ni de remontée récursive de Path.mkdir
+    os.makedirs(path, exist_ok=True)
+    # Les ancêtres existent forcément : inutile de les revérifier pour une autre étape
+    while path and path not in _ensured_dirs:
+        _ensured_dirs.add(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+
+
+def clear_dir_cache() -> None:
+    """Oublie les dossiers déjà créés (ex: après suppression manuelle d'un dossier de sortie)."""
+    _ensured_dirs.clear()
+
+
+# Inventaires de dossiers déjà faits dans ce processus :
+# (chemin, trié, extensions) → (st_mtime_ns du dossier, fichiers, stat des fichiers ou None)
+_listing_cache: Dict[Tuple[str, bool, Optional[Tuple[str, ...]]], Tuple[int, Tuple[Path, ...], Optional[Tuple]]] = {}
+# Un dossier modifié il y a moins de ce délai (ns) n'est pas mis en cache : une écriture dans
+# la même unité de temps du système de fichiers ne changerait pas son mtime (cf. "racy git")
+_LISTING_RACY_NS = 1_000_000_000
+
+
+def clear_listing_cache(paths: Optional[List[str | Path]] = None) -> None:
+    """Oublie les inventaires de dossiers mis en cache (tous, ou seulement ceux de `paths`)."""
+    if paths is None:
+        _listing_cache.clear()
+        return
+    forgotten = {os.path.abspath(p) for p in paths}
+    for key in [key for key in _listing_cache if key[0] in forgotten]:
+        _listing_cache.pop(key, None)
+
+
+def _run_one(process_function: Callable,
+             input_args_tuple: Tuple[Path, ...],
+             input_stats: Optional[Tuple] = None) -> Tuple[Any, Optional[str]]:
+    """Exécute `process_function` pour un élément dans un worker du pool.
+    Défini au niveau module pour être picklable. L'exception éventuelle est capturée et renvoyée
+    sous forme de message, pour qu'un échec n'interrompe pas `executor.map`.
+
+    Returns:
+        (retour de process_function, None) en cas de succès, (None, message d'erreur) sinon.
+    """
+    try:
+        if input_stats is None:
+            return process_function(*input_args_tuple), None
+        return process_function(*input_args_tuple, input_stats=input_stats), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _run_and_save(process_function: Callable, saver: Callable[[Any, Path], Any],
+                  *input_args: Any, **kwargs: Any) -> Any:
+    """Appelle une `process_function` d'étape `inmemory` puis écrit ses résultats avec `saver`.
+    Utilisé quand aucune étape suivante ne reçoit ces résultats en mémoire. Défini au niveau module
+    pour être picklable : l'écriture a lieu dans le worker, comme pour une étape classique.
+
+    Returns:
+        La liste des chemins écrits si la fonction renvoie un dict {chemin: objet}, sinon son retour tel quel.
+    """
+    outputs = process_function(*input_args, **kwargs)
+    if isinstance(outputs, dict):
+        for output_path, obj in outputs.items():
+            saver(obj, output_path)
+        return list(outputs)
+    return outputs
+
+
+def _run_batch(process_function: Callable, input_batch: Tuple[Tuple, ...]) -> List[Tuple[Any, Optional[str]]]:
+    """Exécute `process_function` sur un lot d'éléments (`batch_size` > 1), dans le worker ou en séquentiel.
+    La fonction reçoit `input_batch` (tuple des tuples d'entrée) et renvoie un retour par élément, dans l'ordre.
+
+    Returns:
+        Une paire (retour, message d'erreur ou None) par élément du lot. Une exception, ou un nombre
+        de retours différent de la taille du lot, met tout le lot en erreur.
+    """
+    try:
+        results = list(process_function(input_batch=input_batch))
+    except Exception as e:
+        return [(None, str(e))] * len(input_batch)
+    if len(results) != len(input_batch):
+        return [(None, f"{len(results)} retours pour un lot de {len(input_batch)} éléments")] * len(input_batch)
+    return [(result, None) for result in results]
+
+
+def _prefetch(argument_iterator: Iterator[Tuple], load: Callable[[Tuple], Any], depth: int
+              ) -> Iterator[Tuple[Tuple, concurrent.futures.Future]]:
+    """Applique `load` aux `depth` éléments suivants dans des threads pendant le traitement de l'élément courant.
+    Le décodage (PIL/OpenCV) et la lecture disque relâchent le GIL : lecture et calcul se recouvrent.
+
+    Yields:
+        (input_args_tuple, future du chargement), dans l'ordre de l'itérateur d'origine.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=depth) as executor:
+        window: collections.deque = collections.deque()
+        for input_args_tuple in argument_iterator:
+            window.append((input_args_tuple, executor.submit(load, input_args_tuple)))
+            if len(window) > depth:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+
+def mtime_predicate(input_paths: Tuple[Path, ...], output_dirs: List[Path]) -> bool:
+    """`skip_predicate` par défaut : sortie à jour façon make.
+
+    La sortie attendue est `output_dirs[0] / <nom du 1er fichier d'entrée>`.
+    Renvoie True si elle existe et n'est pas plus ancienne que toutes les entrées.
+    Les éléments non-Path du tuple (ex: booléens du mode 'sample') sont ignorés.
+    """
+    paths = [p for p in input_paths if isinstance(p, Path)]
+    if not paths or not output_dirs:
+        return False
+    try:
+        # Jointure de str : pas de construction/parsing d'un Path par élément
+        output_mtime = os.stat(os.path.join(output_dirs[0], os.path.basename(paths[0]))).st_mtime
+        return output_mtime >= max(os.stat(p).st_mtime for p in paths)
+    except OSError:  # sortie absente (ou entrée illisible) → à traiter
+        return False
+
+
+def _callable_name(function: Optional[Callable]) -> Optional[Tuple[Optional[str], str]]:
+    """(module, nom qualifié) d'un appelable, stable d'une session à l'autre (contrairement à son repr)."""
+    if function is None:
+        return None
+    return getattr(function, '__module__', None), getattr(function, '__qualname__', repr(function))
+
+
+def outputs_exist_predicate(predict_outputs: Callable[..., List[Path]]) -> Callable[[Tuple, List[Path]], bool]:
+    """Construit un `skip_predicate` qui saute les éléments dont toutes les sorties prévues existent déjà.
+
+    `predict_outputs(*input_args, output_dirs=...)` doit renvoyer les chemins que `process_function`
+    produirait pour ces entrées, sans rien calculer. Un seul lstat par sortie (`os.path.lexists`).
+    """
+    def predicate(input_args_tuple: Tuple, output_dirs: List[Path]) -> bool:
+        outputs = predict_outputs(*input_args_tuple, output_dirs=output_dirs)
+        return bool(outputs) and all(os.path.lexists(p) for p in outputs)
+    return predicate
+
+
+def outputs_newer_predicate(predict_outputs: Callable[..., List[Path]]) -> Callable[[Tuple, List[Path]], bool]:
+    """Construit un `skip_predicate` façon make à partir des sorties prévues (voir `outputs_exist_predicate`).
+
+    Saute un élément si toutes ses sorties existent et qu'aucune n'est plus ancienne que ses entrées
+    (ex: overlay et fond pour une superposition). Un stat par entrée et par sortie, aucun décodage.
+    """
+    def predicate(input_args_tuple: Tuple, output_dirs: List[Path]) -> bool:
+        outputs = predict_outputs(*input_args_tuple, output_dirs=output_dirs)
+        if not outputs:
+            return False
+        try:
+            oldest_output = min(os.stat(p).st_mtime for p in outputs)
+            return oldest_output >= max((os.stat(p).st_mtime for p in input_args_tuple if isinstance(p, Path)),
+                                        default=0.0)
+        except OSError:  # sortie absente (ou entrée illisible) → à traiter
+            return False
+    return predicate
+
+
+class BackgroundWriter:
+    """Écritures disque déléguées à un thread dédié, alimenté par une file bornée.
+
+    Fourni à `process_function` (argument `writer`) quand l'étape est créée avec `async_writes=True` :
+    la fonction soumet ses sauvegardes (`writer.submit(image.save, chemin)`) au lieu de les exécuter,
+    l'encodage/écriture de l'élément i recouvre alors le traitement de l'élément i+1.
+    La taille de la file limite la mémoire (la soumission bloque si le thread est en retard).
+    """
+    _STOP = object()
+
+    def __init__(self, maxsize: int = 32):
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        # (fonction, exception) des écritures en échec, remontées à la fermeture
+        self.errors: List[Tuple[Callable, Exception]] = []
+        self._thread = threading.Thread(target=self._loop, name="BackgroundWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, write_function: Callable, *args: Any, **kwargs: Any) -> None:
+        """Met une écriture en file (bloque si la file est pleine)."""
+        self._queue.put((write_function, args, kwargs))
+
+    def _loop(self) -> None:
+        while (item := self._queue.get()) is not self._STOP:
+            write_function, args, kwargs = item
+            try:
+                write_function(*args, **kwargs)
+            except Exception as e:
+                self.errors.append((write_function, e))
+
+    def close(self) -> List[Tuple[Callable, Exception]]:
+        """Attend la fin des écritures en file et arrête le thread. Renvoie les erreurs rencontrées."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+        return self.errors
 
 
 class ProcessingStep:
+    # Attributs fixes : pas de __dict__ par instance (mémoire, accès attribut direct)
+    __slots__ = ('name', 'process_function', 'root_dir', 'process_kwargs', 'sample_k', '_rng', 'save_log',
+                 'lazy_listing', 'extensions', 'skip_predicate', 'pass_stat', 'validate_returns',
+                 'inmemory', 'saver', 'memory_outputs', '_memory_dir', '_memory_source',
+                 'loader', 'prefetch', '_return_shapes', '_stat_cache', 'logger',
+                 'input_paths', 'output_paths', '_resolved', 'fixed_input', 'pairing_method', 'pairing_function',
+                 '_pairing_impl', 'process_logs', 'parallels_workers', 'executor', 'chunksize', 'batch_size',
+                 'async_writes', 'async_bookkeeping', 'warmup', 'seed', '_skip_config')
+
     def __init__(self,
                  name: str,
                  process_function: Callable,
@@ -23,8 +301,27 @@ class ProcessingStep:
                  fixed_input: bool = False,
                  root_dir: Optional[str | Path] = None,
                  sample_k: Optional[int] = None,
+                 seed: Optional[int] = None,
                  save_log: bool = False,
+                 lazy_listing: bool = False,
+                 extensions: Optional[str | Tuple[str, ...]] = None,
                  workers: Optional[int] = 1,
+                 executor: Literal[*EXECUTORS] = 'process',  # type: ignore
+                 chunksize: Optional[int] = 16,
+                 batch_size: int = 1,
+                 warmup: bool | Callable[[], Any] = False,
+                 verbose: bool = False,
+                 skip_predicate: Optional[Callable[[Tuple[Path, ...], List[Path]], bool]] = None,
+                 overwrite: bool | Literal['older'] = True,
+                 predict_outputs: Optional[Callable[..., List[Path]]] = None,
+                 pass_stat: bool = False,
+                 loader: Optional[Callable[[Path], Any]] = None,
+                 prefetch: int = 4,
+                 async_writes: bool = False,
+                 async_bookkeeping: bool = False,
+                 validate_returns: bool = False,
+                 inmemory: bool = False,
+                 saver: Optional[Callable[[Any, Path], Any]] = None,
                  options: Optional[Dict] = None):
         """
         TODO: rewrite et uniformiser les styles de docstring (numpy ou Google)
@@ -37,6 +334,8 @@ class ProcessingStep:
                 Doit accepter un nombre variable d'arguments Path en entrée (selon le mode),
                 la liste des chemins de sortie, et les options.
                 Doit retourner le(s) chemin(s) du/des fichier(s) sauvegardé(s), ou None si échec/rien à sauver.
+                Un attribut `on_step_end` (appelable sans argument) sur la fonction est appelé en fin d'étape
+                pour libérer ce qu'elle garde ouvert le temps de l'étape (ex: fichiers de labels agrégés).
             input_dirs (List): Liste des chemins des dossiers d'entrée (relatifs ou absolus).
             output_dirs (List): Liste des chemins des dossiers de sortie (relatifs ou absolus).
             pairing_method (PairingMethod): Comment combiner les fichiers des input_dirs.
@@ -45,6 +344,66 @@ class ProcessingStep:
             fixed_input (Bool): TODO: ajouter description déjà écrite ailleurs...
                                 TODO 2 : prendre en charge le fixed_input avec les listes de dossiers -> liste de bool ? oO
             root_dir (Optional): Dossier racine pour résoudre les chemins relatifs.
+            seed (Optional[int]): Graine du générateur aléatoire propre à l'étape (sample_k, modes 'modulo' et 'sample').
+                Rend les tirages reproductibles sans toucher à l'état global du module `random`.
+            lazy_listing (bool): En mode 'one_input' ou 'modulo', parcourt le premier dossier d'entrée au fil de l'eau
+                au lieu de construire et trier la liste complète (ordre non garanti, pas de total connu).
+                En 'modulo', l'appariement dépend alors de l'ordre de parcours : non reproductible avec `seed`.
+                En parallèle, les éléments sont soumis au pool au fur et à mesure du parcours.
+            extensions (Optional[str | Tuple[str, ...]]): Extensions de fichiers d'entrée retenues (ex: ('.jpg', '.png')),
+                insensible à la casse. Par défaut tous les fichiers sont retenus.
+            workers (Optional[int]): Nombre de workers parallèles (None ou -1 = tous les CPU disponibles, 1 = séquentiel).
+            executor (str): Type de pool pour l'exécution parallèle.
+                'process' (défaut) pour les traitements CPU (process_function doit être picklable, définie au niveau module),
+                'thread' pour les traitements I/O ou qui relâchent le GIL (copie, PIL/OpenCV).
+            chunksize (Optional[int]): Nombre d'éléments envoyés d'un coup à chaque worker du pool de processus
+                (amortit le coût de communication inter-processus). Ignoré pour les threads.
+                None : calculé au lancement, ~4 paquets par worker (len(tâches) / (4 * workers)).
+            batch_size (int): Nombre d'éléments passés à chaque appel de `process_function` (défaut 1 : un appel par élément).
+                Si > 1, la fonction est appelée avec `input_batch` (tuple des tuples d'entrée) et `output_dirs`,
+                et renvoie la liste des retours habituels, un par élément et dans l'ordre (inférence par lots, ...).
+                `pass_stat`, `loader` et `async_writes` ne sont pas transmis en mode lot.
+            warmup (bool | Callable): Préchauffage avant l'exécution parallèle, pour les fonctions qui initialisent
+                un état coûteux au premier appel (chargement de modèle, ...).
+                True : le premier élément (le premier lot avec `batch_size`) est traité dans le processus principal
+                avant la création du pool (hérité par les workers avec le démarrage 'fork'), y compris en
+                `lazy_listing` et dans `ProcessingPipeline.run_pipelined`.
+                Callable (sans argument) : appelé dans le processus principal avant la création du pool, et en
+                `initializer` de chaque worker si les processus ne sont pas créés par 'fork' (spawn, forkserver).
+            verbose (bool): Active les messages de détail (niveaux INFO/DEBUG) pour cette étape uniquement.
+            skip_predicate (Optional[Callable]): Appelé avec (input_args_tuple, output_paths) avant chaque traitement.
+                S'il renvoie True l'élément est considéré à jour et n'est pas retraité (statut "Skipped").
+                Voir `mtime_predicate` pour un prédicat basé sur les dates de modification.
+            overwrite (bool): Si False, les éléments dont toutes les sorties prévues existent déjà sont sautés
+                (reprise après interruption). Nécessite `predict_outputs`, ou un attribut `predict_outputs`
+                sur `process_function`. S'ajoute à `skip_predicate` s'il est défini.
+                'older' : ne retraite que les éléments dont une sortie manque ou est plus ancienne que
+                l'une des entrées (reconstruction incrémentale façon make, voir `outputs_newer_predicate`).
+                Sans `predict_outputs`, utilise `mtime_predicate`.
+            predict_outputs (Optional[Callable]): Appelé avec (*input_args, output_dirs=output_paths),
+                renvoie les chemins de sortie attendus sans effectuer le traitement.
+            pass_stat (bool): Si True, `process_function` reçoit en plus `input_stats` : un tuple de
+                `os.stat_result` (ou None) aligné sur les chemins d'entrée, obtenus lors de l'inventaire
+                (évite de refaire un stat() sur chaque fichier dans la fonction de traitement).
+            loader (Optional[Callable]): Fonction de chargement (ex: `cv2.imread`, `Image.open`) appliquée à chaque
+                chemin d'entrée (passé en str) par des threads, `prefetch` éléments à l'avance (exécution séquentielle uniquement).
+                `process_function` reçoit alors en plus `loaded_inputs` : le tuple des objets chargés,
+                aligné sur les chemins d'entrée (les éléments non-Path sont passés tels quels).
+            prefetch (int): Nombre d'éléments chargés en avance quand `loader` est défini.
+            async_writes (bool): Fournit à `process_function` un `BackgroundWriter` (argument `writer`) pour
+                déléguer ses sauvegardes à un thread. Toutes les écritures sont terminées à la fin de `run()`.
+                Incompatible avec le pool de processus (ignoré avec un avertissement).
+            async_bookkeeping (bool): En exécution séquentielle, délègue la journalisation de chaque retour
+                (validation, logs, résultats `inmemory`) à un thread. Utile quand `process_function` est courte
+                ou relâche le GIL (NumPy, PIL, OpenCV). Sans effet en parallèle (déjà fait pendant le calcul des workers).
+            validate_returns (bool): Vérifie le type de chaque retour de `process_function`.
+                Par défaut seul le premier retour non vide est vérifié, les suivants sont supposés conformes.
+            inmemory (bool): Résultats transmis en mémoire à l'étape suivante quand c'est possible
+                (voir `ProcessingPipeline._plan_memory_handoff`), sans encodage/écriture puis relecture/décodage.
+                `process_function` renvoie alors un dict {chemin de sortie: objet} au lieu de chemins, et reçoit
+                `loaded_inputs` (objets en mémoire de l'étape précédente, ou chargés par `loader`) quand il y en a.
+            saver (Optional[Callable]): Requis si `inmemory`. Appelé avec (objet, chemin) pour écrire un résultat
+                sur le disque quand il n'est pas transmis en mémoire (dernière étape, plusieurs lecteurs, ...).
             options (Optional[Dict]): Arguments (kwargs) additionnels passés à process_function.
         """
         # TODO: accepter le nom d'une étape lors des manipulations (insertions, ...)
@@ -54,11 +413,64 @@ class ProcessingStep:
         self.root_dir = Path(root_dir) if root_dir else None 
         self.process_kwargs = options or {}
         self.sample_k = sample_k
+        # Générateur local : reproductible et indépendant des autres étapes (pas d'état global partagé)
+        self._rng = random.Random(seed)
+        self.seed = seed
         self.save_log = save_log
+        self.lazy_listing = lazy_listing
+        # tuple en minuscules pour str.endswith (filtre sur le nom, sans construire de Path)
+        if isinstance(extensions, str):
+            extensions = (extensions,)
+        self.extensions: Optional[Tuple[str, ...]] = tuple(ext.lower() for ext in extensions) if extensions else None
+        # Réglages du saut d'éléments (avant composition des prédicats), pour `ProcessingPipeline._step_cache_key`
+        self._skip_config = (overwrite,
+                             _callable_name(predict_outputs or getattr(process_function, 'predict_outputs', None)),
+                             _callable_name(skip_predicate))
+        if overwrite is not True:
+            predict_outputs = predict_outputs or getattr(process_function, 'predict_outputs', None)
+            if predict_outputs is None and overwrite != 'older':
+                warn(f"L'étape '{name}' : `overwrite=False` ignoré, aucune fonction `predict_outputs` pour prévoir les sorties.")
+            else:
+                if overwrite == 'older':
+                    exists_predicate = outputs_newer_predicate(predict_outputs) if predict_outputs else mtime_predicate
+                else:
+                    exists_predicate = outputs_exist_predicate(predict_outputs)
+                if skip_predicate is None:
+                    skip_predicate = exists_predicate
+                else:
+                    user_predicate = skip_predicate
+                    skip_predicate = lambda args, dirs: exists_predicate(args, dirs) or user_predicate(args, dirs)
+        self.skip_predicate = skip_predicate
+        self.pass_stat = pass_stat
+        self.validate_returns = validate_returns
+        if inmemory and saver is None:
+            raise ValueError(f"L'étape '{name}' : `saver` requis avec `inmemory=True` (écriture des résultats non transmis en mémoire).")
+        self.inmemory = inmemory
+        self.saver = saver
+        # Résultats gardés en mémoire pour l'étape suivante (vidé au début de chaque run, jamais remplacé :
+        # l'étape suivante en garde une référence)
+        self.memory_outputs: Dict[Path, Any] = {}
+        # Définis par le pipeline avant l'exécution (voir `ProcessingPipeline._plan_memory_handoff`) :
+        # dossier de sortie transmis en mémoire, et résultats en mémoire de l'étape précédente
+        self._memory_dir: Optional[Path] = None
+        self._memory_source: Optional[Dict[Path, Any]] = None
+        self.loader = loader
+        self.prefetch = max(1, prefetch)
+        # Types de retour déjà validés (Path, list) : les retours suivants de même type ne sont plus inspectés
+        # (réinitialisé à chaque run)
+        self._return_shapes: set = set()
+        # stat_result des fichiers d'entrée, rempli pendant l'inventaire si pass_stat
+        self._stat_cache: Dict[Path, os.stat_result] = {}
+        # Logger propre à l'étape : `verbose` n'affecte pas les autres étapes
+        self.logger = logger.getChild(name)
+        self.logger.setLevel(logging.DEBUG if verbose else logging.NOTSET)
 
         # Résolution des chemins
         self.input_paths: List[Path] = self._resolve_paths(input_dirs or [])
         self.output_paths: List[Path] = self._resolve_paths(output_dirs or [])
+        # Chemins définitifs si résolus par rapport à un root_dir ou déjà tous absolus
+        # → add_step n'a pas besoin de les réévaluer
+        self._resolved = bool(self.root_dir) or all(p.is_absolute() for p in self.input_paths + self.output_paths)
         # TODO: si output_dir non rempli, créer un dossier du même nom que l'étape ? 
         # => vérification d'accents et replace les ` ` par `_`
         self.fixed_input = fixed_input
@@ -77,17 +489,66 @@ class ProcessingStep:
             raise ValueError("Une `pairing_function` valide est requise pour le mode 'custom'.")
         self.pairing_method = pairing_method
         self.pairing_function = pairing_function
+        # Générateur d'appariement résolu une seule fois (plus de cascade if/elif à chaque run)
+        self._pairing_impl: Callable[[List[List[Path]]], Iterator[Tuple]] = {
+            'one_input': self._pair_one_input,
+            'zip': self._pair_zip,
+            'modulo': self._pair_modulo,
+            'sample': self._pair_sample,
+            'custom': self._pair_custom,
+        }[pairing_method]
 
         # Map pour suivre les sorties générées par entrée(s)
         self.process_logs: List[Dict[str, Any]] = []
 
         # Gestion de la parallélisation
-        max_cpus = cpu_count()
-        if workers > max_cpus:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Exécuteur '{executor}' invalide. Choisir parmi: {EXECUTORS}")
+        # CPU réellement utilisables par ce processus (affinité, conteneurs), sinon CPU de la machine
+        max_cpus = (len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else cpu_count()) or 1
+        if workers is None or workers == -1:
+            workers = max_cpus
+        # Les threads (I/O) ne sont pas limités par le nombre de CPU, les processus si
+        if executor == 'process' and workers > max_cpus:
             warn(f"Nombre de workers parallèles ajusté à {max_cpus} (maximum système).")
-        if workers == -1:
             workers = max_cpus
-        self.parallels_workers = min(workers, max_cpus)
+        self.parallels_workers = workers
+
+        # Un pool de processus pickle la fonction par son nom qualifié : lambda et fonctions locales échouent
+        if (executor == 'process' and self.parallels_workers > 1
+                and '<' in getattr(process_function, '__qualname__', '')):
+            raise ValueError(f"L'étape '{self.name}' : `process_function` doit être définie au niveau module "
+                             "pour l'exécution en processus parallèles (ou utiliser executor='thread').")
+        self.executor = executor
+        self.chunksize = max(1, chunksize) if chunksize is not None else None
+        self.batch_size = max(1, batch_size)
+        self.warmup = warmup
+
+        # Le writer (thread + file) ne peut pas être envoyé à d'autres processus
+        if async_writes and executor == 'process' and self.parallels_workers > 1:
+            warn(f"L'étape '{self.name}' : `async_writes` ignoré avec le pool de processus (utiliser executor='thread').")
+            async_writes = False
+        self.async_writes = async_writes
+        self.async_bookkeeping = async_bookkeeping
+
+    @property
+    def processed_files_map(self) -> Dict[Tuple, List[Path]]:
+        """Index entrées → sorties des éléments traités avec succès.
+        Construit à la demande depuis `process_logs` : aucune clé n'est maintenue pendant le traitement.
+        """
+        return {tuple(log["inputs"]): log["outputs"] for log in self.process_logs if log["status"] == "Success"}
+
+    @property
+    def processed_inputs(self) -> List[Tuple]:
+        """Entrées des éléments traités avec succès, dans l'ordre de traitement.
+        Avec `processed_outputs` (même ordre) : parcours des résultats sans construire ni hacher de clés.
+        """
+        return [log["inputs"] for log in self.process_logs if log["status"] == "Success"]
+
+    @property
+    def processed_outputs(self) -> List[List[Path]]:
+        """Sorties des éléments traités avec succès, alignées sur `processed_inputs`."""
+        return [log["outputs"] for log in self.process_logs if log["status"] == "Success"]
 
     def _resolve_paths(self, dir_list: str | Path | List[str | Path]) -> List[Path]:
         """Convertit et résout les chemins par rapport au root_dir. 
@@ -97,18 +558,18 @@ class ProcessingStep:
         # assert dans une liste
         dir_list = [dir_list] if not isinstance(dir_list, list) else dir_list
 
-        resolved = []
+        # Chemins déjà définitifs (Path absolus) : rien à reconstruire ni à rattacher au root_dir
+        if all(isinstance(folder, Path) and folder.is_absolute() for folder in dir_list):
+            return list(dir_list)
+
         for folder in dir_list:
             if not isinstance(folder, (str, Path)):
                 raise ValueError(f"un élément ne représente pas un dossier ou un chemin : {folder}")
-            
-            dir_path = Path(folder)  # Path(Path()) pose pas de problème
-            # Si le chemin n'est pas absolu, on le considère relatif au root_dir
-            if not dir_path.is_absolute() and self.root_dir:
-                resolved.append(self.root_dir / dir_path)
-            else:
-                resolved.append(dir_path)
-        return resolved
+
+        # Un seul Path() par entrée (walrus) ; les chemins relatifs sont rattachés au root_dir s'il existe
+        if (root := self.root_dir) is None:
+            return [Path(folder) for folder in dir_list]
+        return [p if (p := Path(folder)).is_absolute() else root / p for folder in dir_list]
 
     # TODO: Implémenter __str__ pour un résumé utile de l'étape (inputs, outputs, mode)
     def __str__(self) -> str:
@@ -119,42 +580,214 @@ class ProcessingStep:
                 f"  Sortie(s) : [{output_str}]\n"
                 f"  Options   : {self.process_kwargs}")
 
-    def _get_files_from_inputs(self) -> List[List[Path]]:
-        """Liste les fichiers de chaque dossier d'entrée. Lève une erreur si un dossier n'existe pas."""
-        all_file_lists = []
+    def _iter_entries(self, input_dir: Path) -> Iterator[os.DirEntry]:
+        """Générateur sur les entrées (DirEntry) fichiers d'un dossier d'entrée (ordre du système de fichiers),
+        filtrées sur `extensions` si définies. Lève une erreur si le dossier n'existe pas.
+        """
+        # Pas de is_dir() préalable (un stat de plus) : scandir échoue de lui-même sur un dossier absent
+        try:
+            it = os.scandir(input_dir)
+        except (FileNotFoundError, NotADirectoryError) as e:
+            # Lever une erreur si le dossier n'existe pas (ou n'est pas un dossier)
+            raise FileNotFoundError(f"Le dossier d'entrée spécifié n'existe pas: '{input_dir}' pour l'étape '{self.name}'") from e
+
+        # scandir : le type d'entrée vient du d_type, pas de stat() par fichier
+        with it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if self.extensions and not entry.name.lower().endswith(self.extensions):
+                    continue
+                yield entry
+
+    @property
+    def _wants_stat(self) -> bool:
+        # Tailles utiles aussi pour l'ordonnancement parallèle (voir `_largest_first`)
+        return self.pass_stat or self.parallels_workers > 1
+
+    def _iter_files(self, input_dir: Path, wants_stat: Optional[bool] = None) -> Iterator[Path]:
+        """Générateur sur les fichiers d'un dossier d'entrée (ordre du système de fichiers, non trié),
+        filtrés sur `extensions` si définies. Lève une erreur si le dossier n'existe pas.
+        """
+        wants_stat = self._wants_stat if wants_stat is None else wants_stat
+        for entry in self._iter_entries(input_dir):
+            path = Path(entry.path)
+            if wants_stat:
+                # DirEntry met le stat en cache (gratuit sous Windows, un lstat sous Linux)
+                self._stat_cache[path] = entry.stat(follow_symlinks=False)
+            yield path
+
+    def _sorted_files(self, input_dir: Path, wants_stat: Optional[bool] = None) -> List[Path]:
+        """Fichiers d'un dossier d'entrée triés par nom.
+        Le tri porte sur les noms (str, sans clé) : les Path ne sont construits qu'une fois l'ordre établi.
+        """
+        wants_stat = self._wants_stat if wants_stat is None else wants_stat
+        names = []
+        stats = {}
+        for entry in self._iter_entries(input_dir):
+            names.append(entry.name)
+            if wants_stat:
+                stats[entry.name] = entry.stat(follow_symlinks=False)
+        names.sort()
+
+        files = [input_dir / name for name in names]
+        if wants_stat:
+            self._stat_cache.update((path, stats[name]) for path, name in zip(files, names))
+        return files
+
+    def _needs_sorting(self, index: int) -> bool:
+        """Indique si la liste du dossier d'entrée `index` doit être triée.
+        Triée dès que l'ordre influe sur le résultat : appariement par position, ou tirage avec le
+        générateur de l'étape (sinon les tirages dépendraient de l'ordre de scandir et `seed` ne rendrait
+        pas les résultats reproductibles d'une machine ou d'un système de fichiers à l'autre).
+        - 'zip' / 'custom' : appariement par position → listes triées
+        - 'modulo' : 1re liste (appariement), 2e liste (mélangée par `_rng`)
+        - 'sample' : fichiers tirés par `_rng` → triés
+        - 'one_input' : chaque fichier est traité indépendamment → ordre sans importance, sauf avec `sample_k`
+        """
+        return bool(self.sample_k) or self.pairing_method in ('zip', 'custom', 'modulo', 'sample')
+
+    def _scan_one(self, input_dir: Path, sort: bool = True, fresh: bool = False) -> List[Path]:
+        """Liste les fichiers d'un dossier d'entrée (triés par nom si `sort`). Lève une erreur si le dossier n'existe pas.
+        L'inventaire est réutilisé (un seul stat du dossier) tant que le mtime du dossier n'a pas changé,
+        sauf avec `pass_stat` où les stat des fichiers doivent être à jour.
+        `fresh` : inventaire refait sans consulter le cache, avec le stat de chaque fichier (dans `_stat_cache`),
+        puis mis en cache pour l'exécution qui suit (voir `ProcessingPipeline._step_cache_key`).
+        """
+        # Chemin absolu (sans appel système) : un même dossier désigné en relatif ou en absolu
+        # par deux étapes partage son inventaire
+        dir_key = os.path.abspath(input_dir)
+        key = (dir_key, sort, self.extensions)
+        try:
+            dir_mtime = os.stat(input_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None  # l'inventaire ci-dessous lèvera l'erreur adaptée
+        wants_stat = self._wants_stat or fresh
+        cached = None if fresh else _listing_cache.get(key)
+        if cached is None and not sort and not fresh:
+            # Un inventaire trié (ex: étape 'zip' sur le même dossier) convient aussi quand l'ordre est libre
+            cached = _listing_cache.get((dir_key, True, self.extensions))
+        if (cached and dir_mtime is not None and cached[0] == dir_mtime and not self.pass_stat
+                and (cached[2] is not None or not wants_stat)):
+            _, cached_files, cached_stats = cached
+            if cached_files and cached_files[0].parent != input_dir:
+                # inventaire fait par une étape qui désigne le dossier autrement (relatif/absolu)
+                files = [input_dir / p.name for p in cached_files]
+            else:
+                # copie : les modes d'appariement peuvent modifier la liste (mélange)
+                files = list(cached_files)
+            if wants_stat:
+                # tailles pour `_largest_first` (un fichier réécrit sur place peut avoir changé, sans conséquence)
+                self._stat_cache.update(zip(files, cached_stats))
+            return files
+
+        # TODO: ce try serait mieux catch en amont et directement raise des erreur
+        try:
+            # Lister tous les fichiers (et trier seulement si le mode en a besoin)
+            files = self._sorted_files(input_dir, wants_stat) if sort else list(self._iter_files(input_dir, wants_stat))
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            # FIXME: horrible : exception (tout) renvoie une IOError
+            # Gérer autres erreurs potentielles (ex: permissions)
+            raise IOError(f"Échec de l'inventaire du dossier {input_dir}") from e
+
+        if dir_mtime is not None and time.time_ns() - dir_mtime > _LISTING_RACY_NS:
+            stats = tuple(self._stat_cache.get(p) for p in files) if wants_stat else None
+            _listing_cache[key] = (dir_mtime, tuple(files), stats)
+        return files
+
+    def _scan_many(self, dirs_to_scan: List[Tuple[Path, bool]]) -> List[List[Path]]:
+        """`_scan_one` sur plusieurs (dossier, trié) en parallèle (threads), résultats dans l'ordre des dossiers.
+        Un seul dossier : inventaire direct, sans pool.
+        """
+        if len(dirs_to_scan) <= 1:
+            return [self._scan_one(input_dir, sort) for input_dir, sort in dirs_to_scan]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(dirs_to_scan))) as executor:
+            futures = [executor.submit(self._scan_one, input_dir, sort) for input_dir, sort in dirs_to_scan]
+            # Résultats récupérés par position (pas as_completed) pour conserver l'ordre des dossiers
+            return [future.result() for future in futures]
+
+    def _get_files_from_inputs(self) -> List[List[Path] | Iterator[Path]]:
+        """Liste les fichiers de chaque dossier d'entrée. Lève une erreur si un dossier n'existe pas.
+        Les dossiers sont inventoriés en parallèle (threads) : scandir relâche le GIL,
+        le temps total devient celui du dossier le plus lent au lieu de la somme.
+
+        Avec `lazy_listing` en mode 'one_input' ou 'modulo' (sans `sample_k`), le premier dossier est renvoyé
+        sous forme de générateur plutôt que de liste : rien n'est matérialisé ni trié avant le premier élément
+        ('modulo' matérialise seulement la 2e liste, tirée au hasard).
+        Les listes ne sont triées que si le mode d'appariement en dépend (voir `_needs_sorting`).
+        """
         if not self.input_paths:
             raise ValueError(f"{self.name} : Aucun dossier d'entrée défini.")
 
-        print(f"Info [{self.name}]: Récupération des chemins de fichiers d'entrée...")
-        for input_dir in self.input_paths:
-            if not input_dir.is_dir():
-                # Lever une erreur si le dossier n'existe pas (ou n'est pas un dossier)
-                raise FileNotFoundError(f"Le dossier d'entrée spécifié n'existe pas: '{input_dir}' pour l'étape '{self.name}'")
-            
-            # TODO: ce try serait mieux catch en amont et directement raise des erreur
-            try:
-                # Lister tous les fichiers et trier
-                files = sorted([f for f in input_dir.iterdir() if f.is_file()])
-                # TODO : fonction utilitaire pour gérer les pluriel. (ou lib "inflect")
-                print(f"  '{input_dir.name}' : {len(files)} fichiers trouvés.") 
-                all_file_lists.append(files)
-            except Exception as e:
-                # FIXME: horrible : exception (tout) renvoie une IOError
-                # Gérer autres erreurs potentielles (ex: permissions)
-                raise IOError(f"Échec de l'inventaire du dossier {input_dir}") from e
+        self._stat_cache = {}
+        if self._memory_source is not None:
+            # Premier dossier d'entrée reçu en mémoire de l'étape précédente, complété par les fichiers déjà
+            # sur le disque (éléments sautés en amont : déjà à jour, `overwrite=False`, `skip_predicate`)
+            memory_dir = self.input_paths[0]
+            extensions = self.extensions
+            in_memory = {p.name: p for p in self._memory_source
+                         if p.parent == memory_dir and (not extensions or p.name.lower().endswith(extensions))}
+            disk_files, *other_lists = self._scan_many([(input_dir, self._needs_sorting(i))
+                                                        for i, input_dir in enumerate(self.input_paths)])
+            memory_files = list(in_memory.values())
+            memory_files += [p for p in disk_files if p.name not in in_memory]
+            if self._needs_sorting(0):
+                memory_files.sort(key=lambda p: p.name)
+            if self.logger.isEnabledFor(logging.INFO):
+                lines = [f"Info [{self.name}]: Récupération des chemins de fichiers d'entrée...",
+                         f"  '{memory_dir.name}' : {len(in_memory)} éléments reçus en mémoire, "
+                         f"{len(memory_files) - len(in_memory)} lus sur le disque."]
+                lines += [f"  '{other_dir.name}' : {len(other)} fichiers trouvés."
+                          for other_dir, other in zip(self.input_paths[1:], other_lists)]
+                self.logger.info("\n".join(lines))
+            return [memory_files, *other_lists]
+
+        if self.lazy_listing and self.pairing_method in ('one_input', 'modulo') and not self.sample_k:
+            input_dir = self.input_paths[0]
+            files = self._iter_files(input_dir)
+            # Lecture du premier élément : dossier absent ou vide signalé tout de suite,
+            # pas à la première itération de la boucle de traitement
+            first = next(files, None)
+            if first is None:
+                raise FileNotFoundError(f"Aucun fichier trouvé dans les dossiers d'entrée ['{input_dir}'] pour l'étape '{self.name}'.")
+            lazy_files = itertools.chain((first,), files)
+            other_lists = self._scan_many([(other_dir, self._needs_sorting(i))
+                                           for i, other_dir in enumerate(self.input_paths[1:], start=1)])
+            if self.logger.isEnabledFor(logging.INFO):
+                lines = [f"Info [{self.name}]: Récupération des chemins de fichiers d'entrée...",
+                         f"  '{input_dir.name}' : parcours paresseux (nombre de fichiers inconnu)."]
+                lines += [f"  '{other_dir.name}' : {len(other)} fichiers trouvés."
+                          for other_dir, other in zip(self.input_paths[1:], other_lists)]
+                self.logger.info("\n".join(lines))
+            return [lazy_files, *other_lists]
 
+        all_file_lists = self._scan_many([(input_dir, self._needs_sorting(i))
+                                          for i, input_dir in enumerate(self.input_paths)])
+
+        # Un seul message multi-ligne (une écriture) plutôt qu'un print par dossier
+        if self.logger.isEnabledFor(logging.INFO):
+            # TODO : fonction utilitaire pour gérer les pluriel. (ou lib "inflect")
+            lines = [f"Info [{self.name}]: Récupération des chemins de fichiers d'entrée..."]
+            lines += [f"  '{input_dir.name}' : {len(files)} fichiers trouvés."
+                      for input_dir, files in zip(self.input_paths, all_file_lists)]
+            self.logger.info("\n".join(lines))
         return all_file_lists
 
-    def _generate_processing_inputs(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple[Path, ...]]:
+    def _generate_processing_inputs(self, input_file_lists: List[List[Path]]
+                                    ) -> Tuple[Optional[int], Iterator[Tuple[Path, ...]]]:
         """
         Génère les tuples d'arguments (chemins) pour `process_function` basé sur le mode.
         
-        TODO : lister les modes disponibles avec courte description de la logique
+        Le générateur propre au mode (`_pair_<mode>`) est choisi à l'init, voir leurs docstrings.
 
         Args:
             input_file_lists: Liste contenant des listes de Path, pour chaque dossier d'entrée.
 
-        Yields:
+        Returns:
+            (total, générateur) : le nombre d'éléments à traiter, calculé sans parcourir le générateur
+            (None si inconnu : listing paresseux, mode 'custom' sans len()), et le générateur du mode, qui produit :
             Tuple[Path, ...]: Un tuple de chemins (Path) à passer comme *args
                               à la fonction de traitement pour chaque appel.
                               *chaque élément du tuple est "dépaqueté" et représente un argument dans la fonction attendue*
@@ -162,129 +795,223 @@ class ProcessingStep:
                                 def foo(*args): OK
                                 def foo(bar=*args) Error
         """
-        input_len = len(input_file_lists)
+        # Pas de vérification globale des listes vides (elle consommerait un listing paresseux) :
+        # chaque mode vérifie, à l'appel, les seules entrées dont il dépend (voir `_pair_<mode>`)
 
-        # Vérifier qu'aucune liste n'est vide (zip s'arrêterait, mais c'est plus clair de prévenir)
-        if not all(input_file_lists):
-            empty_folders = [str(self.input_paths[i]) for i, lst in enumerate(input_file_lists) if not lst] 
-            raise FileNotFoundError(f"Aucun fichier trouvé dans les dossiers d'entrée {empty_folders} pour l'étape '{self.name}'.")
-        
         # Prélève le nombre d'éléments prescrit. Aux même ids pour chaque liste d'input
         # BUG: normalement si sample_k=100 et que input_lists[1] (2e élément) = 80, on devrait avoir une IndexError car le sample avec id=95 n'existera pas dans input_lists[1]
         if self.sample_k and isinstance(self.sample_k, int):  # askip vérifier les types n'est pas pythonique, on "trust" les inputs sinon ça raise une erreur anyway
-            sample_ids = random.sample(range(len(input_file_lists[0])), self.sample_k)
+            sample_ids = self._rng.sample(range(len(input_file_lists[0])), self.sample_k)
             input_file_lists = [[file_list[i] for i in sample_ids] for file_list in input_file_lists]
         
-        # Modes de génération :
-        if self.pairing_method == 'one_input':
-            if input_len == 0:  # Sécurité
-                raise ValueError("Mode 'one_input' mais aucun dossier d'entrée fourni.")
-            input_files = input_file_lists[0]
-
-            for file_path in input_files:
-                yield (file_path,)  # Tuple avec un seul élément
-
-        elif self.pairing_method == 'zip':
-            if input_len < 2:
-                raise ValueError("Le mode 'zip' requiert au moins 2 dossiers d'entrée.")
-
-            yield from zip(*input_file_lists)
-
-        elif self.pairing_method == 'modulo':
-            # à la différence de zip, modulo revient au début de la deuxième liste si elle est totalement parcourue
-            if input_len != 2:
-                raise ValueError("Le mode 'modulo' requiert exactement 2 dossiers d'entrée.")
-            list1 = input_file_lists[0]
-            list2 = input_file_lists[1]
-
-            # TODO ? shuffle_input en option ? pareil pour zip ?
-            # shuffle seulement la 2e liste (backgrounds) suffisant.
-            random.shuffle(list2)
-
-            list2_len = len(list2)
-            for i, path1 in enumerate(list1):
-                path2 = list2[i % list2_len]
-                yield (path1, path2)
-        
-        elif self.pairing_method == 'sample':
-            # méthode spécifique pour l'étape de transformation
-            # TODO: à généraliser ?
+        # Mode de génération, choisi une fois pour toutes à l'init.
+        # Renvoyé directement (pas de `yield from`) : pas de générateur intermédiaire par élément,
+        # et les vérifications ci-dessus sont faites à l'appel, dans le try de `run`.
+        argument_iterator = self._pairing_impl(input_file_lists)
+        return self._count_inputs(input_file_lists, argument_iterator), argument_iterator
 
-            input_files = input_file_lists[0]
+    def _count_inputs(self, input_file_lists: List[List[Path]], argument_iterator: Iterator) -> Optional[int]:
+        """Nombre d'éléments que produira le générateur du mode, déduit des longueurs des listes (O(1))."""
+        try:
+            if self.pairing_method == 'zip':
+                return min(len(lst) for lst in input_file_lists)
+            if self.pairing_method == 'custom':
+                # une `pairing_function` qui renvoie une liste (et non un générateur) a une longueur
+                return len(argument_iterator)
+            return len(input_file_lists[0])  # 'one_input', 'modulo', 'sample' : un élément par fichier du 1er dossier
+        except TypeError:  # listing paresseux, générateur : pas de len()
+            return None
 
-            # Sample un set des fichiers où appliquer la transfo
-            blur_sample = set(random.sample(input_files, int(len(input_files)*0.3)))
-            # Crée une liste de booléens (donnés en paramètres d'input) 
-            # Indiquant si l'élément évalué doit subir la transformation
-            do_blur = [i in blur_sample for i in input_files]
+    def _no_files_error(self, *input_indices: int) -> FileNotFoundError:
+        """Erreur commune aux modes lorsqu'un dossier d'entrée ne contient aucun fichier."""
+        empty_folders = [str(self.input_paths[i]) for i in input_indices]
+        return FileNotFoundError(f"Aucun fichier trouvé dans les dossiers d'entrée {empty_folders} pour l'étape '{self.name}'.")
 
-            # idem pour la transfo RGB
-            rgb_sample = set(random.sample(input_files, int(len(input_files)*0.3)))
-            do_rgb = [i in rgb_sample for i in input_files]
+    def _peek(self, files: List[Path] | Iterator[Path], input_index: int) -> Iterator[Path]:
+        """Lit le premier élément (liste ou listing paresseux) et le remet en tête.
+        Lève `FileNotFoundError` si l'entrée est vide, sans consommer le reste."""
+        files = iter(files)
+        first = next(files, _MISSING)
+        if first is _MISSING:
+            raise self._no_files_error(input_index)
+        return itertools.chain((first,), files)
 
-            yield from zip(input_files, do_blur, do_rgb)
+    def _pair_one_input(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple[Path, ...]]:
+        """'one_input' : un tuple par fichier du premier dossier."""
+        # Pas un générateur : les vérifications ont lieu à l'appel, le générateur est renvoyé ensuite
+        if len(input_file_lists) == 0:  # Sécurité
+            raise ValueError("Mode 'one_input' mais aucun dossier d'entrée fourni.")
+        return ((file_path,) for file_path in self._peek(input_file_lists[0], 0))  # Tuples avec un seul élément
 
-        elif self.pairing_method == 'custom':
-            if not self.pairing_function:
-                raise ValueError("Fonction `pairing_function` manquante pour le mode 'custom'.")
-            
-            yield from self.pairing_function(input_file_lists)
+    def _pair_zip(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple[Path, ...]]:
+        """'zip' : fichiers de même rang dans chaque dossier (s'arrête à la liste la plus courte)."""
+        if len(input_file_lists) < 2:
+            raise ValueError("Le mode 'zip' requiert au moins 2 dossiers d'entrée.")
 
-        else:
-            # Normalement impossible grâce à Literal et la vérif init
-            raise NotImplementedError(f"Mode d'appariement' '{self.pairing_method}' non implémentée.")
+        # zip tronque silencieusement à la liste la plus courte : on prévient
+        # (les longueurs servent aussi à détecter les dossiers vides, sans parcours supplémentaire)
+        lengths = [len(lst) for lst in input_file_lists]
+        shortest = min(lengths)
+        if shortest == 0:
+            raise self._no_files_error(*(i for i, length in enumerate(lengths) if not length))
+        if shortest != max(lengths):
+            warn(f"[{self.name}] mode 'zip' : dossiers de tailles différentes {lengths}, "
+                 f"seuls les {shortest} premiers fichiers de chaque dossier seront appariés.")
+
+        return zip(*input_file_lists)
+
+    def _pair_modulo(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple[Path, ...]]:
+        """'modulo' : chaque fichier du 1er dossier est associé à un fichier aléatoire du 2e."""
+        # à la différence de zip, modulo revient au début de la deuxième liste si elle est totalement parcourue
+        if len(input_file_lists) != 2:
+            raise ValueError("Le mode 'modulo' requiert exactement 2 dossiers d'entrée.")
+        list2 = input_file_lists[1]
+        if not list2:
+            raise self._no_files_error(1)
+        list1 = input_file_lists[0]
+        if isinstance(list1, list):
+            if not list1:
+                raise self._no_files_error(0)
+            # Longueur connue : ordre de la 2e liste tiré d'un coup (O(min(n1, n2)), même loi que le mélange),
+            # puis appariement par zip/cycle, sans générateur Python ni tirage par élément
+            order = self._rng.sample(list2, min(len(list1), len(list2)))
+            return zip(list1, itertools.cycle(order))
+        return self._modulo_pairs(self._peek(list1, 0), list2)
+
+    def _modulo_pairs(self, list1: Iterator[Path], list2: List[Path]) -> Iterator[Tuple[Path, Path]]:
+        """Générateur de `_pair_modulo` pour un listing paresseux (longueur de list1 inconnue)."""
+        # TODO ? shuffle_input en option ? pareil pour zip ?
+        # shuffle seulement la 2e liste (backgrounds) suffisant.
+        list2_len = len(list2)
+        randrange = self._rng.randrange
+        # Fisher-Yates paresseux : la position i n'est tirée qu'au moment d'être utilisée.
+        # Même loi qu'un mélange complet, mais O(len(list1)) si list1 est courte (ou interrompue),
+        # et fonctionne avec un list1 sans len() (listing paresseux). Au-delà d'un tour, l'ordre est réutilisé.
+        for i, path1 in enumerate(list1):
+            if i < list2_len:
+                j = randrange(i, list2_len)
+                list2[i], list2[j] = list2[j], list2[i]
+            yield (path1, list2[i % list2_len])
+
+    def _pair_sample(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple[Path, bool, bool]]:
+        """'sample' : chaque fichier accompagné de deux booléens (flou, RGB) tirés sur 30% des fichiers."""
+        # méthode spécifique pour l'étape de transformation
+        # TODO: à généraliser ?
+
+        input_files = input_file_lists[0]
+        if not input_files:
+            raise self._no_files_error(0)
+
+        # Sample un set des fichiers où appliquer la transfo
+        blur_sample = set(self._rng.sample(input_files, int(len(input_files)*0.3)))
+        # Crée une liste de booléens (donnés en paramètres d'input) 
+        # Indiquant si l'élément évalué doit subir la transformation
+        do_blur = [i in blur_sample for i in input_files]
+
+        # idem pour la transfo RGB
+        rgb_sample = set(self._rng.sample(input_files, int(len(input_files)*0.3)))
+        do_rgb = [i in rgb_sample for i in input_files]
+
+        return zip(input_files, do_blur, do_rgb)
+
+    def _pair_custom(self, input_file_lists: List[List[Path]]) -> Iterator[Tuple]:
+        """'custom' : délégué à `pairing_function`."""
+        if not self.pairing_function:
+            raise ValueError("Fonction `pairing_function` manquante pour le mode 'custom'.")
+        # Listes toujours matérialisées dans ce mode : `not` ne consomme rien
+        empty_indices = [i for i, lst in enumerate(input_file_lists) if not lst]
+        if empty_indices:
+            raise self._no_files_error(*empty_indices)
+
+        # Retour transmis tel quel : une liste garde sa longueur (total de la barre de progression)
+        return self.pairing_function(input_file_lists)
+
+    def run(self) -> bool:
+        """Exécute l'étape de traitement pour tous les éléments/paires d'entrée.
+        Renvoie True si l'étape s'est terminée sans erreur."""
+        # Redirection sur toute l'étape (listage et bilan compris) : le handler tqdm installé sur le
+        # logger racine est aussi ce qui affiche les messages INFO d'une étape `verbose` (sans lui,
+        # logging retombe sur `lastResort`, niveau WARNING, et ces messages sont perdus)
+        with _redirect_logging():
+            if not self._begin_run():
+                return False
+
+            # 2. Lister les fichiers d'entrée, 3. obtenir l'itérateur d'arguments
+            prepared = self._prepare_inputs()
+            if prepared is None:
+                return False
+            total_items, argument_iterator = prepared
 
-    def run(self):
-        """Exécute l'étape de traitement pour tous les éléments/paires d'entrée."""
+            # --------------------------------------------------------------------------------------------
+            #                    4. Boucle de traitement (avec tqdm SoonTM tkt)
+            # --------------------------------------------------------------------------------------------
+
+            writer = BackgroundWriter() if self.async_writes else None
+            try:
+                processed_count, errors_count = self._processing_loop(argument_iterator, total_items, writer)
+            finally:
+                # Les fichiers doivent exister à la fin de l'étape (l'étape suivante les lit)
+                write_errors = writer.close() if writer else []
+            for write_function, e_write in write_errors:
+                self.logger.error("Erreur [%s]: Échec d'écriture différée (%s): %s",
+                                  self.name, getattr(write_function, '__qualname__', write_function), e_write)
+            errors_count += len(write_errors)
+            return self._finish_run(processed_count, errors_count)
+
+    def _begin_run(self) -> bool:
+        """Début commun des exécutions : remise à zéro des résultats et création des dossiers de sortie.
+        Renvoie False si l'étape ne peut pas démarrer."""
         self.process_logs = []  # Retrace les résultats, y'a un truc à faire avec... un jour...
+        self._return_shapes.clear()
+        self.memory_outputs.clear()
         print(f"--- Exécution Étape : {self.name} ---")
         # print(self) # Utiliser __str__ pour afficher les détails si besoin 
         # TODO : paramètre verbose -> avec logging
 
-        # 1. Créer les dossiers de sortie (une seule fois au début)
-        print(f"Info [{self.name}]: Vérification/Création des dossiers de sortie...")
+        # 1. Créer les dossiers de sortie (une seule fois au début).
+        # makedirs à chaque exécution, sans le mémo de `_ensure_dir` : un dossier supprimé depuis
+        # une exécution précédente (même processus) est recréé
         for output_path in self.output_paths:
             try:
-                output_path.mkdir(parents=True, exist_ok=True)
-                print(f"  Sortie -> '{output_path}'")
+                os.makedirs(output_path, exist_ok=True)
             except IOError as ioe:
                 raise IOError(f"Impossible de créer le dossier de sortie '{output_path}': {ioe}") from ioe 
             except Exception as e:
-                print(f"Erreur lors de la création du dossier {output_path}. {e}")
-                return
+                self.logger.error("Erreur lors de la création du dossier %s. %s", output_path, e)
+                return False
         
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("\n".join([f"Info [{self.name}]: Vérification/Création des dossiers de sortie..."]
+                                       + [f"  Sortie -> '{output_path}'" for output_path in self.output_paths]))
+        return True
+
+    def _prepare_inputs(self) -> Optional[Tuple[Optional[int], Iterator[Tuple]]]:
+        """Liste les fichiers d'entrée et construit l'itérateur d'arguments.
+        Renvoie (total, itérateur), ou None (erreur journalisée) si l'étape ne peut pas démarrer."""
         # 2. Lister les fichiers d'entrée
         try:
             input_file_lists = self._get_files_from_inputs()
         except (FileNotFoundError, ValueError, IOError) as e:
-            print(f"Erreur [{self.name}]: Condition préalable non remplie pour démarrer l'étape. {e}")
-            return
+            self.logger.error("Erreur [%s]: Condition préalable non remplie pour démarrer l'étape. %s", self.name, e)
+            return None
 
         # 3. Obtenir l'itérateur d'arguments
         try:
-            argument_iterator = self._generate_processing_inputs(input_file_lists)
-            # TODO et si le mode du générateur renvoyait un tuple avec le total d'opération ? (pour tqdm tsé 👀) 
-            # => solution : créer une classe générator qui yield comme la méthode et possède un attribut .total
-        except (ValueError, NotImplementedError) as e:
-            print(f"Erreur [{self.name}]: Impossible de générer les arguments pour le mode '{self.pairing_method}'. {e}")
-            return
+            return self._generate_processing_inputs(input_file_lists)
+        except (FileNotFoundError, ValueError, NotImplementedError) as e:
+            self.logger.error("Erreur [%s]: Impossible de générer les arguments pour le mode '%s'. %s",
+                              self.name, self.pairing_method, e)
+            return None
 
-        # Calcul du total pour tqdm
-        # TODO: en faire un attribut de classe self.total_items et le définir dans self._generate_processing_inputs
-        total_items = None
-        try:
-            if self.pairing_method == 'one_input': total_items = len(input_file_lists[0])
-            elif self.pairing_method == 'modulo': total_items = len(input_file_lists[0])
-            elif self.pairing_method == 'zip': total_items = min(len(lst) for lst in input_file_lists if lst)
-            elif self.pairing_method == 'sample' : total_items = min()
-            else: raise ValueError(f"mode d'appariemment inconnu, utiliser un parmi {MODES}")
-        except Exception: total_items = None
-
-        # --------------------------------------------------------------------------------------------
-        #                    4. Boucle de traitement (avec tqdm SoonTM tkt)
-        # --------------------------------------------------------------------------------------------
-
-        processed_count, errors_count = self._processing_loop(argument_iterator, total_items)
+    def _finish_run(self, processed_count: int, errors_count: int) -> bool:
+        """Fin commune des exécutions : invalidation des inventaires, sauvegarde des logs et résumé.
+        Renvoie True si aucune erreur n'a été comptée."""
+        # Ressources gardées ouvertes par la fonction le temps de l'étape (fermées avant le fork des workers suivants)
+        on_step_end = getattr(self.process_function, 'on_step_end', None)
+        if on_step_end is not None:
+            on_step_end()
+        # Le contenu des dossiers de sortie a changé : les étapes suivantes doivent les relister
+        clear_listing_cache(self.output_paths)
         # TODO: déduire success/error count à partir de self.process_logs (à rename btw)
         # TODO: voir la pertinence de process_logs avec un vrai système de logging avec option d'output structuré (le json qu'on s'emmerde à build là)
         process_counts = Counter(log.get("status") for log in self.process_logs) 
@@ -293,182 +1020,515 @@ class ProcessingStep:
         if self.process_logs and self.save_log:
             self._save_process_logs_to_json()
         else:
-            print(f"Info [{self.name}] : Aucun log de traitement généré.")
+            self.logger.info("Info [%s] : Aucun log de traitement généré.", self.name)
         
         # TODO: intégrer le timings (quoique, avec tqdm.... :pray:)
         print(f"--- Étape {self.name} terminée ---") 
         print(f"  {processed_count} éléments traités avec succès (fichiers de sortie générés).")
+        if process_counts["Skipped"]:
+            print(f"  dont {process_counts['Skipped']} déjà à jour (non retraités).")
         if errors_count > 0:
             print(f"  {errors_count} erreur(s) ou traitement(s) sans retour.")
+        return errors_count == 0
 
     def _processing_loop(self, 
                          argument_iterator: Iterator[Tuple[Path, ...]], 
-                         total_items: int) -> Tuple[int, int]:
+                         total_items: int,
+                         writer: Optional[BackgroundWriter] = None) -> Tuple[int, int]:
         """Exécute la boucle de traitement principale, soit en séquentiel, soit en parallèle.
         Met à jour self.process_logs et retourne les compteurs.
         """
         success_count = 0
         error_count = 0
+        bound_function = self._bind_function(writer)
+
+        if self.batch_size > 1:
+            return self._batched_processing_loop(argument_iterator, total_items, bound_function)
 
         # --- Logique Séquentielle ---
         if not self.parallels_workers or 0 <= self.parallels_workers <= 1:
-            print(f"Info [{self.name}]: Exécution en mode séquentiel...")
-            for input_args_tuple in tqdm(argument_iterator, 
-                                         desc=self.name, 
-                                         total=total_items, 
-                                         unit="item", 
-                                         leave=True, 
-                                         smoothing=0):
-                log_entry: Dict[str, Any] = {
-                    "inputs": list(input_args_tuple), 
-                    "outputs": None,
-                    "status": "Pending",
-                    "error_message": None, 
-                    # "options_used": self.process_kwargs.copy()
-                }
+            self.logger.info("Info [%s]: Exécution en mode séquentiel...", self.name)
+            # Chargement anticipé des entrées dans des threads si un loader est fourni
+            prepared_inputs = (_prefetch(argument_iterator, self._load_inputs, self.prefetch)
+                               if self.loader or self._memory_source
+                               else ((input_args_tuple, None) for input_args_tuple in argument_iterator))
+            # Journalisation déléguée à un thread (`async_bookkeeping`) : validation du retour, mise en mémoire
+            # (`inmemory`) et ajout aux logs recouvrent le traitement de l'élément suivant. Un seul thread
+            # consommateur : les logs restent dans l'ordre de traitement.
+            bookkeeper = BackgroundWriter(maxsize=256) if self.async_bookkeeping else None
+            outcomes: Counter = Counter()  # {True: succès, False: échecs}, comptés par `_record_result`
+            append_log = (functools.partial(bookkeeper.submit, self.process_logs.append) if bookkeeper
+                          else self.process_logs.append)
+            # Attributs et méthodes liés en variables locales : lus une fois, pas à chaque élément
+            skip_predicate = self.skip_predicate
+            output_paths = self.output_paths
+            pass_stat = self.pass_stat
+            build_log = self._build_log
+            record_result = self._record_result
+            try:
+                for input_args_tuple, loading in _get_tqdm()(prepared_inputs, 
+                                                      desc=self.name, 
+                                                      total=total_items, 
+                                                      unit="item", 
+                                                      leave=True, 
+                                                      mininterval=_PROGRESS_INTERVAL):
+                    log_entry: Dict[str, Any] = {
+                        "inputs": input_args_tuple,  # tuple conservé tel quel (json le sérialise en liste)
+                        "outputs": None,
+                        "status": "Pending",
+                        "error_message": None, 
+                        # "options_used": self.process_kwargs.copy()
+                    }
 
-                try:
-                    # Appel de la fonction de traitement
-                    saved_output_paths: Optional[Path | List[Path]] = self.process_function(
-                        *input_args_tuple,              # Dépaquette les chemins d'entrée
-                        output_dirs=self.output_paths,  # liste des dossiers de sortie
-                        **self.process_kwargs           # Passage des options en kwargs
-                    )
-                    # Met à jour le log
-                    success = self._build_log(log_entry, saved_output_paths)
-                    if success:
-                        success_count += 1
-                    else: 
-                        error_count += 1
+                    try:
+                        # Sortie déjà à jour : pas de retraitement
+                        # (avec prefetch, le prédicat est évalué dans le thread de chargement → `loaded` None)
+                        loaded = loading.result() if loading else None
+                        if (loaded is None and skip_predicate
+                                and (loading or skip_predicate(input_args_tuple, output_paths))):
+                            log_entry["status"] = "Skipped"
+                            append_log(log_entry)
+                            success_count += 1
+                            continue
+
+                        # Appel de la fonction de traitement (chemins d'entrée dépaquetés)
+                        if not pass_stat and loaded is None:
+                            saved_output_paths: Optional[Path | List[Path]] = bound_function(*input_args_tuple)
+                        else:
+                            extra_kwargs = {}
+                            if pass_stat:
+                                extra_kwargs["input_stats"] = self._input_stats(input_args_tuple)
+                            if loaded is not None:
+                                extra_kwargs["loaded_inputs"] = loaded
+                            saved_output_paths = bound_function(*input_args_tuple, **extra_kwargs)
+                        if bookkeeper:
+                            bookkeeper.submit(record_result, log_entry, saved_output_paths, outcomes)
+                            continue
+                        # Met à jour le log
+                        if build_log(log_entry, saved_output_paths):
+                            success_count += 1
+                        else: 
+                            error_count += 1
                 
-                except Exception as e_proc:
-                    # Erreur inattendue dans process_function ou lors de l'appel
-                    tqdm.write(f"\nErreur [{self.name}]: Échec traitement de {input_args_tuple}: {e_proc}")
-                    log_entry.update({
-                        "status" : "Error",
-                        "error_message" : str(e_proc)
-                    })
-                    error_count += 1
+                    except Exception as e_proc:
+                        # Erreur inattendue dans process_function ou lors de l'appel
+                        self.logger.error("Erreur [%s]: Échec traitement de %s: %s", self.name, input_args_tuple, e_proc)
+                        log_entry.update({
+                            "status" : "Error",
+                            "error_message" : str(e_proc)
+                        })
+                        error_count += 1
 
-                # Ajout de l'entrée de log
-                self.process_logs.append(log_entry)
+                    # Ajout de l'entrée de log
+                    append_log(log_entry)
+            finally:
+                if bookkeeper:
+                    error_count += len(bookkeeper.close())
 
-            return success_count, error_count
+            return success_count + outcomes[True], error_count + outcomes[False]
         
         # --- Logique Parallèle --- 
         elif self.parallels_workers > 1 or self.parallels_workers == -1:
-            print(f"Info [{self.name}]: Exécution en mode parallèle avec {self.parallels_workers} workers...")
+            self.logger.info("Info [%s]: Exécution en mode parallèle avec %d workers (%s)...",
+                             self.name, self.parallels_workers, self.executor)
+
+            if self.lazy_listing and total_items is None:
+                # Inventaire au fil de l'eau (`lazy_listing`) : chaque élément est soumis au pool dès sa découverte,
+                # le parcours du dossier recouvre les premiers traitements (pas d'ordre plus-gros-d'abord)
+                progress = _get_tqdm()(argument_iterator, desc=self.name, unit="item", leave=True,
+                                       mininterval=_PROGRESS_INTERVAL)
+                return self._stream_loop(progress, None, bound_function)
 
             list_of_input_args = list(argument_iterator)
             if not list_of_input_args:
                 # NOTE: gemini n'aime pas le raise ici, il préfère print et return (0, 0)
                 raise RuntimeError(f"Aucun argument à traiter après génération. Fin.")
+
+            # Plus gros fichiers soumis en premier : moins de workers inactifs en fin de traitement
+            list_of_input_args = self._largest_first(list_of_input_args)
             
-            # Mettre à jour total_item si l'itérateur a été consomé
-            # NOTE: quand on passera total_items en attribut de classe, (à priori) virer cette partie qui deviendra useless ?
-            if total_items is None:
-                total_items = len(list_of_input_args)
-            
-            with concurrent.futures.ProcessPoolExecutor(max_workers=self.parallels_workers) as executor:
-                # Dictionnaire pour mapper les futures aux arguments d'entrée (pour le logging d'erreur)
-                future_to_log: Dict[concurrent.futures.Future, Dict[str, Any]] = {}
-
-                print(f"Info [{self.name}]: Soumission de {len(list_of_input_args)} tâches au pool de processus...")
-                for input_args_tuple in list_of_input_args:
-                    # pré-créer une partie de l'entrée log pour l'associer au future
-                    # l'output et le statut seront mis à jour plus tard
-                    log_entry = {
-                        "inputs" : list(input_args_tuple),
-                        "outputs" : None, 
-                        "status" : "Pending Execution",
-                        "error_message" : None,
-                        # "options_used" : self.process_kwargs.copy()
-                    }
-                    try:
-                        future = executor.submit(
-                            self.process_function,
-                            *input_args_tuple,
-                            output_dirs=self.output_paths,
-                            **self.process_kwargs
-                        )
-                        future_to_log[future] = log_entry
-                    except Exception as e_submit:
-                        tqdm.write(f"Erreur [{self.name}]: Échec de la soumission de la tâche pour {input_args_tuple}: {e_submit}")
+            # Entrées de log pré-créées (ordre de soumission), mises à jour avec les résultats
+            pending_logs: List[Dict[str, Any]] = []
+            skip_predicate = self.skip_predicate
+            output_paths = self.output_paths
+            for input_args_tuple in list_of_input_args:
+                log_entry = {
+                    "inputs" : input_args_tuple,
+                    "outputs" : None, 
+                    "status" : "Pending Execution",
+                    "error_message" : None,
+                    # "options_used" : self.process_kwargs.copy()
+                }
+                # Sortie déjà à jour : pas de soumission
+                if skip_predicate and skip_predicate(input_args_tuple, output_paths):
+                    log_entry["status"] = "Skipped"
+                    self.process_logs.append(log_entry)
+                    success_count += 1
+                    continue
+                pending_logs.append(log_entry)
+
+            tasks = [log_entry["inputs"] for log_entry in pending_logs]
+            stats = ([self._input_stats(t) for t in tasks] if self.pass_stat
+                     else itertools.repeat(None, len(tasks)))
+            worker = functools.partial(_run_one, bound_function)
+
+            # Préchauffage : premier élément traité ici, avant la création du pool (état hérité par fork)
+            warm_results = []
+            if self.warmup is True and tasks:
+                stats = iter(stats)
+                warm_results.append(worker(tasks[0], next(stats)))
+
+            remaining = tasks[len(warm_results):]
+            # Paquets assez gros pour amortir les échanges, assez nombreux (~4 par worker) pour équilibrer la charge
+            chunksize = self.chunksize or max(1, len(remaining) // (4 * self.parallels_workers))
+            with self._make_pool() as executor:
+                self.logger.info("Info [%s]: Soumission de %d tâches au pool (paquets de %d)...",
+                                 self.name, len(remaining), chunksize)
+                # map + chunksize : un aller-retour inter-processus par paquet et non par élément.
+                # Les résultats arrivent dans l'ordre de soumission → associés aux logs par position.
+                results = itertools.chain(warm_results,
+                                          executor.map(worker, remaining, stats, chunksize=chunksize))
+                done = 0
+                build_log = self._build_log
+                try:
+                    for saved_output_paths, error in _get_tqdm()(results,
+                                                          total=len(tasks),
+                                                          desc=self.name,
+                                                          unit="item",
+                                                          leave=True,
+                                                          mininterval=_PROGRESS_INTERVAL):
+                        log_entry = pending_logs[done]
+                        done += 1
+                        if error is None:
+                            if build_log(log_entry, saved_output_paths):
+                                success_count += 1
+                            else:
+                                error_count += 1
+                        else:  # Erreur DANS le worker (capturée par _run_one)
+                            error_msg = f"Échec tâche parallèle pour {[str(p) for p in log_entry["inputs"]]} : {error}"
+                            self.logger.error("Erreur [%s]: %s", self.name, error_msg)
+                            log_entry.update({
+                                "status" : "Error",
+                                "error_message" : error_msg
+                            })
+                            error_count += 1
+                        self.process_logs.append(log_entry)
+
+                except Exception as e_pool:
+                    # Échec du pool lui-même (pickling, processus tué...) : les tâches restantes sont perdues
+                    self.logger.error("Erreur [%s]: Échec de l'exécution parallèle : %s", self.name, e_pool)
+                    for log_entry in pending_logs[done:]:
                         log_entry.update({
                             "status" : "Submission Error",
-                            "error_message" : str(e_submit)
+                            "error_message" : str(e_pool)
                         })
                         self.process_logs.append(log_entry)
                         error_count += 1
-                
-                for future in tqdm(concurrent.futures.as_completed(future_to_log.keys()),
-                                   total=len(future_to_log),
-                                   desc=self.name,
-                                   unit="item",
-                                   leave=True,
-                                   smoothing=0):
-                    # Récupère les args d'origine pour ce future
-                    log_entry = future_to_log[future] 
-
-                    try:
-                        saved_output_paths: Optional[Path | List[Path]] = future.result()  # Bloque jusqu'à résultat
-                        success = self._build_log(log_entry, saved_output_paths)
-                        if success:
-                            success_count += 1
-                        else:
-                            error_count += 1
-                    
-                    except Exception as e_exec: # Erreur DANS le processus enfant
-                        error_msg = f"Échec tâche parallèle pour {[str(p) for p in log_entry["inputs"]]} : {e_exec}"
-                        tqdm.write(f"\nErreur [{self.name}]: {error_msg}")
-                        log_entry.update({
-                            "status" : "Error",
-                            "error_message" : error_msg
-                        })
-                        # import traceback; tqdm.write(traceback.format_exc()) # Pour debug
-                        errors_count += 1
 
-                    self.process_logs.append(log_entry)
-            
             return success_count, error_count
         
         # NeverTM
         else:
             raise ValueError(f"Logique non prévue, veuillez revoir le nombre de workers attribués à la tâche.")
 
+    def _bind_function(self, writer: Optional[BackgroundWriter] = None) -> Callable:
+        """`process_function` avec ses arguments fixes liés une fois pour toutes."""
+        # Dossiers de sortie et options liés une seule fois (pas de fusion de kwargs à chaque appel)
+        bound_function = functools.partial(self.process_function,
+                                           output_dirs=self.output_paths,
+                                           **self.process_kwargs)
+        if writer is not None:
+            bound_function = functools.partial(bound_function, writer=writer)
+        if self.inmemory and self._memory_dir is None:
+            # Aucune étape ne reçoit les résultats en mémoire : écriture directe (dans le worker en parallèle)
+            bound_function = functools.partial(_run_and_save, bound_function, self.saver)
+        return bound_function
+
+    def _run_stream(self,
+                    inputs: Optional[Iterator[Tuple[Path, ...]]] = None,
+                    emit: Optional[Callable[[Path], Any]] = None,
+                    position: Optional[int] = None) -> bool:
+        """Exécution au fil de l'eau (voir `ProcessingPipeline.run_pipelined`).
+        Renvoie True si l'étape s'est terminée sans erreur (comme `run`).
+
+        Les tuples d'arguments viennent de `inputs` (ex: sorties de l'étape précédente au fur et à mesure),
+        ou du listing habituel si None. Chaque chemin de sortie d'un élément réussi est passé à `emit`
+        dès la fin de son traitement. Les éléments sont traités dans l'ordre d'arrivée, par le pool si
+        `workers` > 1 (fenêtre bornée de tâches en cours). `async_writes` n'est pas utilisé :
+        un fichier transmis doit déjà être écrit.
+        """
+        # Redirection sur toute l'étape, comme dans `run`
+        with _redirect_logging():
+            if not self._begin_run():
+                return False
+            total_items = None
+            if inputs is None:
+                prepared = self._prepare_inputs()
+                if prepared is None:
+                    return False
+                total_items, inputs = prepared
+
+            progress = _get_tqdm()(inputs, desc=self.name, total=total_items, unit="item", leave=True,
+                                   position=position, mininterval=_PROGRESS_INTERVAL)
+            processed_count, errors_count = self._stream_loop(progress, emit)
+            return self._finish_run(processed_count, errors_count)
+
+    def _stream_loop(self, argument_iterator: Iterator[Tuple[Path, ...]],
+                     emit: Optional[Callable[[Path], Any]],
+                     bound_function: Optional[Callable] = None) -> Tuple[int, int]:
+        """Boucle de `_run_stream` (et des étapes parallèles en `lazy_listing`) : résultats journalisés
+        (et transmis) dans l'ordre d'arrivée des éléments."""
+        success_count = 0
+        error_count = 0
+        bound_function = bound_function or self._bind_function()
+        pass_stat = self.pass_stat
+        parallel = self.parallels_workers > 1
+        # `warmup=True` : pool créé après le premier élément traité ici (voir `_processing_loop`)
+        pool = self._make_pool() if parallel and self.warmup is not True else None
+        window: collections.deque = collections.deque()  # (tuple d'entrée, future ou (retour, erreur) ou None si à jour)
+
+        def settle(input_args_tuple: Tuple[Path, ...], outcome: Any) -> None:
+            nonlocal success_count, error_count
+            log_entry: Dict[str, Any] = {"inputs": input_args_tuple, "outputs": None, "status": "Pending", "error_message": None}
+            if outcome is None:
+                log_entry["status"] = "Skipped"
+                success_count += 1
+            else:
+                saved_output_paths, error = outcome.result() if isinstance(outcome, concurrent.futures.Future) else outcome
+                if error is None and self._build_log(log_entry, saved_output_paths):
+                    success_count += 1
+                    if emit is not None:
+                        for output_path in log_entry["outputs"]:
+                            emit(output_path)
+                else:
+                    if error is not None:
+                        self.logger.error("Erreur [%s]: Échec traitement de %s: %s", self.name, input_args_tuple, error)
+                        log_entry.update({"status": "Error", "error_message": error})
+                    error_count += 1
+            self.process_logs.append(log_entry)
+
+        try:
+            for input_args_tuple in argument_iterator:
+                if self.skip_predicate and self.skip_predicate(input_args_tuple, self.output_paths):
+                    outcome = None
+                else:
+                    input_stats = self._input_stats(input_args_tuple) if pass_stat else None
+                    if pool is not None:
+                        outcome = pool.submit(_run_one, bound_function, input_args_tuple, input_stats)
+                    else:
+                        outcome = _run_one(bound_function, input_args_tuple, input_stats)
+                        if parallel:  # préchauffage fait : les workers héritent de l'état initialisé
+                            pool = self._make_pool()
+                window.append((input_args_tuple, outcome))
+                # En parallèle, jusqu'à 2 tâches par worker en cours ; en séquentiel, résultat traité aussitôt
+                if len(window) > (2 * self.parallels_workers if parallel else 0):
+                    settle(*window.popleft())
+            while window:
+                settle(*window.popleft())
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+        return success_count, error_count
+
+    def _batched_processing_loop(self,
+                                 argument_iterator: Iterator[Tuple[Path, ...]],
+                                 total_items: Optional[int],
+                                 bound_function: Callable) -> Tuple[int, int]:
+        """Variante de la boucle de traitement par lots de `batch_size` éléments (voir `_run_batch`).
+        Les lots sont traités en séquentiel, ou répartis sur le pool si `workers` > 1.
+        """
+        success_count = 0
+        error_count = 0
+
+        def pending_items() -> Iterator[Dict[str, Any]]:
+            # Les éléments déjà à jour sont journalisés tout de suite, sans entrer dans un lot
+            nonlocal success_count
+            for input_args_tuple in argument_iterator:
+                log_entry = {"inputs": input_args_tuple, "outputs": None, "status": "Pending", "error_message": None}
+                if self.skip_predicate and self.skip_predicate(input_args_tuple, self.output_paths):
+                    log_entry["status"] = "Skipped"
+                    self.process_logs.append(log_entry)
+                    success_count += 1
+                    progress_bar.update(1)
+                    continue
+                yield log_entry
+
+        worker = functools.partial(_run_batch, bound_function)
+        self.logger.info("Info [%s]: Traitement par lots de %d éléments...", self.name, self.batch_size)
+
+        progress_bar = _get_tqdm()(desc=self.name, total=total_items, unit="item", leave=True, mininterval=_PROGRESS_INTERVAL)
+        parallel = self.parallels_workers > 1
+        # `warmup=True` : pool créé après le premier lot traité ici (voir `_processing_loop`)
+        pool = self._make_pool() if parallel and self.warmup is not True else None
+        window: collections.deque = collections.deque()  # (lot d'entrées de log, future ou résultats du lot)
+
+        def settle(log_batch: Tuple[Dict[str, Any], ...], outcome: Any) -> None:
+            nonlocal success_count, error_count
+            results = outcome.result() if isinstance(outcome, concurrent.futures.Future) else outcome
+            for log_entry, (saved_output_paths, error) in zip(log_batch, results):
+                if error is None and self._build_log(log_entry, saved_output_paths):
+                    success_count += 1
+                else:
+                    if error is not None:
+                        self.logger.error("Erreur [%s]: Échec traitement de %s: %s", self.name, log_entry['inputs'], error)
+                        log_entry.update({"status": "Error", "error_message": error})
+                    error_count += 1
+                self.process_logs.append(log_entry)
+            progress_bar.update(len(log_batch))
+
+        try:
+            # Lots formés au fil de l'inventaire (rien n'est matérialisé d'avance)
+            for log_batch in itertools.batched(pending_items(), self.batch_size):
+                input_batch = tuple(log_entry["inputs"] for log_entry in log_batch)
+                if pool is not None:
+                    outcome = pool.submit(worker, input_batch)
+                else:
+                    outcome = worker(input_batch)
+                    if parallel:  # préchauffage fait : les workers héritent de l'état initialisé
+                        pool = self._make_pool()
+                window.append((log_batch, outcome))
+                # En parallèle, jusqu'à 2 lots par worker en cours ; en séquentiel, lot traité aussitôt
+                if len(window) > (2 * self.parallels_workers if parallel else 0):
+                    settle(*window.popleft())
+            while window:
+                settle(*window.popleft())
+        finally:
+            progress_bar.close()
+            if pool:
+                pool.shutdown(cancel_futures=True)
+        return success_count, error_count
+
+    def _make_pool(self) -> concurrent.futures.Executor:
+        """Crée le pool d'exécution parallèle, après l'éventuel préchauffage `warmup` (callable)."""
+        if self.executor == 'thread':
+            if callable(self.warmup):
+                self.warmup()  # état partagé par les threads
+            return concurrent.futures.ThreadPoolExecutor(max_workers=self.parallels_workers)
+        pool_kwargs = {}
+        if callable(self.warmup):
+            # Avant la création du pool : avec 'fork', les workers héritent de l'état initialisé (pages partagées)
+            self.warmup()
+            if multiprocessing.get_start_method() != 'fork':
+                pool_kwargs["initializer"] = self.warmup
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.parallels_workers, **pool_kwargs)
+
+    def _input_stats(self, input_args_tuple: Tuple[Path, ...]) -> Tuple[Optional[os.stat_result], ...]:
+        """stat_result de l'inventaire pour chaque élément du tuple d'entrée (None si non-Path ou inconnu)."""
+        return tuple(self._stat_cache.get(p) if isinstance(p, Path) else None for p in input_args_tuple)
+
+    def _load_inputs(self, input_args_tuple: Tuple) -> Optional[Tuple]:
+        """Charge les chemins d'un tuple d'entrée avec `loader` (appelé depuis les threads de prefetch).
+        Renvoie None sans rien charger si `skip_predicate` indique que l'élément est à jour.
+        """
+        if self.skip_predicate and self.skip_predicate(input_args_tuple, self.output_paths):
+            return None
+        # Chemins passés en str : accepté par tous les loaders (cv2.imread n'accepte pas toujours un Path)
+        memory = self._memory_source
+        if memory is not None:
+            if input_args_tuple[0] not in memory and not self.loader:
+                # Élément resté sur le disque (sauté par l'étape précédente) : `loaded_inputs` vide,
+                # `process_function` lit elle-même ses fichiers
+                return ()
+            # Objets de l'étape précédente retirés au passage : la mémoire est libérée au fil du traitement
+            return tuple(memory.pop(arg) if isinstance(arg, Path) and arg in memory
+                         else self.loader(os.fspath(arg)) if self.loader and isinstance(arg, Path)
+                         else arg
+                         for arg in input_args_tuple)
+        return tuple(self.loader(os.fspath(arg)) if isinstance(arg, Path) else arg for arg in input_args_tuple)
+
+    def _largest_first(self, list_of_input_args: List[Tuple[Path, ...]]) -> List[Tuple[Path, ...]]:
+        """Trie les tâches par taille cumulée des fichiers d'entrée, décroissante (heuristique LPT).
+        Utilise les stat de l'inventaire : aucun appel système supplémentaire.
+        Ordre inchangé si aucune taille n'est connue (ex: mode 'custom' sans fichiers inventoriés).
+        """
+        if not self._stat_cache:
+            return list_of_input_args
+
+        def task_size(input_args_tuple: Tuple[Path, ...]) -> int:
+            stats = (self._stat_cache.get(p) for p in input_args_tuple if isinstance(p, Path))
+            return sum(st.st_size for st in stats if st is not None)
+
+        return sorted(list_of_input_args, key=task_size, reverse=True)
+
+    # Normalisation des retours de `process_function` par type exact (une recherche dans un dict,
+    # pas de cascade isinstance) : liste des chemins de sortie, ou None si le retour est invalide
+    _OUTPUT_NORMALIZERS: Dict[type, Callable[[Any], Optional[List[Path]]]] = {
+        type(Path()): lambda path: [path],
+        list: lambda paths: paths if all(isinstance(p, Path) for p in paths) else None,
+    }
+
     def _build_log(self,
                    log_entry: Dict[str, Any],
                    saved_output_paths: Optional[Path | List[Path]]
                    ) -> bool:
-        """Met à jour un log_entry avec le résultat de `process_function`. Modifie le log entry directement."""
-        if saved_output_paths:
-            if isinstance(saved_output_paths, Path):
-                # TODO: ptet forcer à output une liste de Path finalement ? (dans la process_function j'entends).
-                log_entry.update({
-                    "outputs" : [saved_output_paths],
-                    "status" : "Success"
-                })
-                return True
-            elif isinstance(saved_output_paths, list) and all(isinstance(p, Path) for p in saved_output_paths):
-                log_entry.update({
-                    "outputs" : saved_output_paths,
-                    "status" : "Success"
-                })
-                return True
-            else:
-                warn_msg = (f"Retour invalide (parallèle) de {self.process_function.__name__} pour "
-                            f"{[str(p) for p in log_entry["inputs"]]} (type : {type(saved_output_paths)})."
-                            "Attendu Path, List[Path] ou None.")
-                warn(warn_msg)
-                log_entry.update({
-                    "status" : "Type Error",
-                    "error_message" : warn_msg
-                })
-                return False
-        else:
+        """Met à jour un log_entry avec le résultat de `process_function`. Modifie le log entry directement.
+        Une fois un retour d'un type donné (Path, list) validé, les suivants du même type ne sont plus inspectés
+        (un seul test de type, sauf `validate_returns`). Un retour d'un autre type (str, tuple, ...) reste vérifié.
+        Sous `python -O` (`__debug__` faux), aucun retour n'est inspecté sauf `validate_returns`.
+        """
+        return_type = type(saved_output_paths)
+        if return_type is dict and self.inmemory:
+            saved_output_paths = self._keep_in_memory(saved_output_paths)
+            return_type = list
+        if not saved_output_paths:
             log_entry["status"] = "no_output"
             return False
 
+        if (return_type in self._return_shapes or not __debug__) and not self.validate_returns:
+            # Forme déjà vérifiée : pas de parcours isinstance de la liste à chaque élément
+            log_entry["outputs"] = saved_output_paths if return_type is list else [saved_output_paths]
+            log_entry["status"] = "Success"
+            return True
+
+        normalize = self._OUTPUT_NORMALIZERS.get(return_type)
+        if normalize is None and isinstance(saved_output_paths, Path):  # sous-classe de Path
+            normalize = self._OUTPUT_NORMALIZERS[type(Path())]
+        outputs = normalize(saved_output_paths) if normalize else None
+        if outputs is None:
+            warn_msg = (f"Retour invalide (parallèle) de {self.process_function.__name__} pour "
+                        f"{[str(p) for p in log_entry["inputs"]]} (type : {return_type})."
+                        "Attendu Path, List[Path] ou None.")
+            warn(warn_msg)
+            log_entry.update({
+                "status" : "Type Error",
+                "error_message" : warn_msg
+            })
+            return False
+
+        # TODO: ptet forcer à output une liste de Path finalement ? (dans la process_function j'entends).
+        log_entry.update({
+            "outputs" : outputs,
+            "status" : "Success"
+        })
+        self._return_shapes.add(return_type)
+        return True
+
+    def _record_result(self, log_entry: Dict[str, Any], saved_output_paths: Any, outcomes: Counter) -> None:
+        """Journalise un retour de `process_function` (thread de `async_bookkeeping`).
+        Le résultat (succès ou non) est compté dans `outcomes`, lu une fois le thread arrêté.
+        """
+        try:
+            success = self._build_log(log_entry, saved_output_paths)
+        except Exception as e_log:  # `saver` en échec (inmemory), ...
+            self.logger.error("Erreur [%s]: Échec journalisation de %s: %s", self.name, log_entry["inputs"], e_log)
+            log_entry.update({"status": "Error", "error_message": str(e_log)})
+            success = False
+        outcomes[success] += 1
+        self.process_logs.append(log_entry)
+
+    def _keep_in_memory(self, outputs: Dict[Path, Any]) -> List[Path]:
+        """Garde en mémoire les résultats destinés à l'étape suivante, écrit les autres avec `saver`.
+        Renvoie les chemins de sortie (pour le log), écrits ou non.
+        """
+        # Attributs liés une fois par appel : une étape produit souvent plusieurs sorties par élément
+        memory_dir, memory_outputs, saver = self._memory_dir, self.memory_outputs, self.saver
+        for output_path, obj in outputs.items():
+            if output_path.parent == memory_dir:
+                memory_outputs[output_path] = obj
+            else:
+                saver(obj, output_path)
+        return list(outputs)
+
     def _save_process_logs_to_json(self) -> None:
         """Sauvegarde la liste des logs de traitement dans un fichier JSON,
         en utilisant un encodeur personnalisé pour les objets Path.
@@ -481,25 +1541,31 @@ class ProcessingStep:
             return
         
         if not self.process_logs:
-            print(f"Info [{self.name}] : Aucun fichier traité à enregistrer dans le JSON (`process_logs` est vide).")
+            self.logger.info("Info [%s] : Aucun fichier traité à enregistrer dans le JSON (`process_logs` est vide).", self.name)
             return
 
         # Chemin du fichier JSON de sortie
         json_file_path = self.output_paths[0].parent / Path(self.name).with_suffix(".json")
 
-        print(f"Info [{self.name}]: Enregistrement des logs de fichiers traités dans {json_file_path}...")
+        self.logger.info("Info [%s]: Enregistrement des logs de fichiers traités dans %s...", self.name, json_file_path)
         try:
-            with json_file_path.open("w", encoding="utf-8") as j:
-                # Utiliser l'encodeur personnalisé
-                json.dump(self.process_logs, j, indent=4, ensure_ascii=False, cls=PathJSONEncoder)
-            print(f"Info [{self.name}]: Logs sauvegardé avec succès.")
-        except (IOError, TypeError) as e: # TypeError peut être levé par json.dump
-            print(f"Erreur critique [{self.name}]: Impossible d'enregistrer le fichier JSON des résultats: {e}")
+            if orjson is not None:
+                # Encodage en bytes (C) et une seule écriture ; Path → str via `default`
+                json_file_path.write_bytes(orjson.dumps(self.process_logs, default=str, option=orjson.OPT_INDENT_2))
+            else:
+                with json_file_path.open("w", encoding="utf-8") as j:
+                    # Utiliser l'encodeur personnalisé
+                    json.dump(self.process_logs, j, indent=2, ensure_ascii=False, cls=PathJSONEncoder)
+            self.logger.info("Info [%s]: Logs sauvegardé avec succès.", self.name)
+        except (IOError, TypeError) as e: # TypeError peut être levé par json.dump (orjson.JSONEncodeError en hérite)
+            self.logger.error("Erreur critique [%s]: Impossible d'enregistrer le fichier JSON des résultats: %s", self.name, e)
         except Exception as e_unexpected:
-            print(f"Erreur inattendue [{self.name}] lors de la sauvegarde JSON: {e_unexpected}")
+            self.logger.error("Erreur inattendue [%s] lors de la sauvegarde JSON: %s", self.name, e_unexpected)
             
 
 class ProcessingPipeline:
+    __slots__ = ('steps', 'root_dir')
+
     def __init__(self, root_dir: Optional[str | Path] = None):
         self.steps: List[ProcessingStep] = []
         # définit le dossier source du pipeline → obligatoire ?
@@ -515,8 +1581,11 @@ class ProcessingPipeline:
         if self.root_dir and not step.root_dir:
             step.root_dir = self.root_dir
             # réévalue les chemins suite à la modification (éventuelle) du root_dir
-            step.input_paths = step._resolve_paths(step.input_paths)
-            step.output_paths = step._resolve_paths(step.output_paths)
+            # sauf s'ils sont déjà définitifs (tous absolus)
+            if not step._resolved:
+                step.input_paths = step._resolve_paths(step.input_paths)
+                step.output_paths = step._resolve_paths(step.output_paths)
+                step._resolved = True
 
         # Si non précisé, on assert `position` à la dernière étape (volontairement = len(steps) donc out of index)
         position = len(self.steps) if position is None else position
@@ -552,7 +1621,282 @@ class ProcessingPipeline:
         # === AJOUT DE L'ÉTAPE ===
         self.steps.insert(position, step)
 
-    def run(self, from_step_index: int = 0, only_one: bool = False):
+    @staticmethod
+    def _step_is_up_to_date(step: ProcessingStep) -> bool:
+        """Indique si toutes les sorties d'une étape sont à jour (logique make).
+
+        Chaque fichier du premier dossier d'entrée doit avoir un fichier de même nom, au moins
+        aussi récent, dans le premier dossier de sortie. Ces sorties doivent aussi être plus récentes
+        que tous les fichiers des autres dossiers d'entrée (ex: fonds du mode 'modulo').
+        Un seul scandir par dossier : les dates viennent des DirEntry.
+        """
+        if not step.input_paths or not step.output_paths:
+            return False
+        try:
+            with os.scandir(step.output_paths[0]) as it:
+                output_mtimes = {e.name: e.stat().st_mtime for e in it if e.is_file()}
+            if not output_mtimes:
+                return False
+
+            oldest_output = float('inf')
+            with os.scandir(step.input_paths[0]) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    output_mtime = output_mtimes.get(entry.name)
+                    if output_mtime is None or output_mtime < entry.stat().st_mtime:
+                        return False
+                    oldest_output = min(oldest_output, output_mtime)
+
+            for input_dir in step.input_paths[1:]:
+                with os.scandir(input_dir) as it:
+                    if any(e.is_file() and e.stat().st_mtime > oldest_output for e in it):
+                        return False
+        except OSError:  # dossier absent ou illisible → à exécuter
+            return False
+        return True
+
+    @staticmethod
+    def _step_cache_key(step: ProcessingStep) -> str:
+        """Empreinte d'une exécution d'étape : configuration (fonction, options, appariement, `seed`,
+        réglages du saut d'éléments, sorties) et inventaire des dossiers d'entrée (nom, taille, date de modification de chaque fichier).
+        Un scandir par dossier d'entrée, aucun fichier n'est lu. L'inventaire passe par `_scan_one` de l'étape :
+        il est mis en cache et l'exécution qui suit ne relist pas ses dossiers d'entrée.
+        Une option dont le repr varie d'une session à l'autre (objet sans __repr__) change l'empreinte :
+        l'étape est alors simplement réexécutée.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((step.name, _callable_name(step.process_function),
+                            sorted(step.process_kwargs.items(), key=lambda item: item[0]),
+                            step.pairing_method, _callable_name(step.pairing_function), step.sample_k,
+                            step.seed, step.fixed_input, step._skip_config, step.extensions,
+                            [str(p) for p in step.output_paths])).encode())
+        step._stat_cache = {}
+        for i, input_dir in enumerate(step.input_paths):
+            # Même tri que l'exécution (clé de cache d'inventaire partagée) ; stat à jour (`fresh`)
+            files = step._scan_one(input_dir, step._needs_sorting(i), fresh=True)
+            entries = sorted((p.name, (st := step._stat_cache[p]).st_size, st.st_mtime_ns) for p in files)
+            digest.update(repr((str(input_dir), entries)).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _cache_key_path(step: ProcessingStep) -> Path:
+        # À côté du dossier de sortie (comme le JSON des logs) : jamais listé comme entrée d'une étape.
+        # Nom de l'étape assaini (séparateurs, espaces...) ; le hash du nom brut distingue "a b" de "a_b"
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in step.name)
+        name_hash = hashlib.blake2b(step.name.encode(), digest_size=4).hexdigest()
+        return step.output_paths[0].parent / f".{safe_name}-{name_hash}.cache_key"
+
+    def _run_step(self, i: int, step: ProcessingStep, incremental: bool) -> bool:
+        """Exécute une étape du pipeline ; en mode `incremental`, la saute si elle est à jour.
+        Renvoie False si l'étape s'est terminée avec des erreurs (ou n'a pas pu démarrer).
+
+        À jour : l'empreinte (`_step_cache_key`) enregistrée lors de sa dernière exécution sans erreur est
+        identique (mêmes options, mêmes fichiers d'entrée) et son dossier de sortie n'est pas vide.
+        Sans empreinte enregistrée, repli sur la comparaison des dates (`_step_is_up_to_date`).
+        Les étapes reliées en mémoire (`inmemory`) sont toujours exécutées.
+        """
+        cache_key = None
+        if incremental and step.output_paths and step._memory_dir is None and step._memory_source is None:
+            key_path = self._cache_key_path(step)
+            try:
+                cache_key = self._step_cache_key(step)
+                stored_key = key_path.read_text(encoding='utf-8') if key_path.is_file() else None
+                with os.scandir(step.output_paths[0]) as it:
+                    has_outputs = next(it, None) is not None
+            except OSError:  # dossier absent ou illisible → à exécuter, sans empreinte
+                cache_key, stored_key, has_outputs = None, None, False
+            up_to_date = (stored_key == cache_key if stored_key is not None
+                          else self._step_is_up_to_date(step))
+            if has_outputs and up_to_date:
+                print(f"Étape {i}: {step.name} à jour, ignorée.")
+                return True
+        elif incremental and self._step_is_up_to_date(step):
+            print(f"Étape {i}: {step.name} à jour, ignorée.")
+            return True
+
+        print(f"Running étape {i}: {step.name}")
+        succeeded = step.run()
+        if succeeded and cache_key is not None:
+            # Écriture atomique : une empreinte n'est jamais lue à moitié écrite
+            tmp_path = key_path.with_name(key_path.name + ".tmp")
+            tmp_path.write_text(cache_key, encoding='utf-8')
+            os.replace(tmp_path, key_path)
+        return succeeded
+
+    def _plan_memory_handoff(self, steps_to_do: List[ProcessingStep]) -> None:
+        """Relie en mémoire les étapes consécutives `inmemory` : les résultats de l'étape A destinés
+        au premier dossier d'entrée de B ne sont ni écrits ni relus, B les reçoit via `loaded_inputs`.
+
+        Retour au disque (écriture par `saver`) si : A ou B n'est pas `inmemory`, une autre étape du pipeline
+        lit aussi ce dossier, B s'exécute en parallèle (`loaded_inputs` est réservé au séquentiel),
+        ou A s'exécute dans des processus (les objets devraient revenir par pickle).
+        Les éléments que A saute (déjà à jour) restent sur le disque : B les liste et les lit normalement.
+        """
+        for step in self.steps:
+            step._memory_dir = None
+            step._memory_source = None
+
+        for producer, consumer in zip(steps_to_do, steps_to_do[1:]):
+            if not (producer.inmemory and consumer.inmemory and producer.output_paths and consumer.input_paths):
+                continue
+            handoff_dir = producer.output_paths[0]
+            if consumer.input_paths[0] != handoff_dir:
+                continue
+            if any(handoff_dir in step.input_paths for step in self.steps if step is not consumer):
+                continue
+            if consumer.parallels_workers > 1:
+                continue
+            if producer.parallels_workers > 1 and producer.executor == 'process':
+                continue
+            producer._memory_dir = handoff_dir
+            # même dict (vidé mais jamais remplacé par `run`) : rempli par A, consommé par B
+            consumer._memory_source = producer.memory_outputs
+
+    @staticmethod
+    def _prepare_output_dirs(steps_to_do: List[ProcessingStep]) -> None:
+        """Crée en une passe les dossiers de sortie de toutes les étapes à exécuter (chacun une seule fois,
+        ancêtres communs compris) : les `run()` des étapes n'ont plus aucun appel système à faire.
+        Le cache des dossiers créés est conservé d'un run à l'autre ; seul un dossier de sortie supprimé
+        depuis le run précédent (notebook, balayage de paramètres) en est retiré, pour être recréé.
+        """
+        for step in steps_to_do:
+            for output_path in step.output_paths:
+                path = os.fspath(output_path)
+                if path in _ensured_dirs and not os.path.isdir(path):
+                    _ensured_dirs.discard(path)
+                try:
+                    _ensure_dir(path)
+                except OSError as e:
+                    raise IOError(f"Impossible de créer le dossier de sortie '{output_path}' de l'étape '{step.name}': {e}") from e
+
+    @staticmethod
+    def clear_listing_cache() -> None:
+        """Oublie tous les inventaires de dossiers en cache (ex: fichiers ajoutés/supprimés hors pipeline
+        dans la même seconde que le dernier inventaire)."""
+        clear_listing_cache()
+
+    @staticmethod
+    def _step_dependencies(steps: List[ProcessingStep]) -> List[List[int]]:
+        """Pour chaque étape, indices des étapes précédentes dont elle dépend.
+
+        B (après A dans la liste) dépend de A si leurs dossiers se recouvrent d'une façon qui impose l'ordre :
+        A écrit ce que B lit, A et B écrivent au même endroit, ou B écrit ce que A lit.
+        """
+        def dirs(paths: List[Path]) -> set:
+            return {os.path.normpath(os.path.abspath(p)) for p in paths}
+
+        reads = [dirs(step.input_paths) for step in steps]
+        writes = [dirs(step.output_paths) for step in steps]
+        return [[a for a in range(b)
+                 if writes[a] & reads[b] or writes[a] & writes[b] or reads[a] & writes[b]]
+                for b in range(len(steps))]
+
+    def _run_steps_concurrently(self, steps_to_do: List[ProcessingStep], from_step_index: int, incremental: bool) -> List[str]:
+        """Exécute en même temps les étapes indépendantes (voir `_step_dependencies`).
+        Chaque étape attend la fin de celles dont elle dépend ; un échec (exception, ou erreurs sur des éléments)
+        annule les étapes qui en dépendent, qui travailleraient sur des entrées incomplètes.
+        Les threads ne font qu'orchestrer : chaque étape garde son propre pool de workers.
+        Renvoie les noms des étapes en échec ou annulées.
+        """
+        dependencies = self._step_dependencies(steps_to_do)
+
+        def run_step(i: int, step: ProcessingStep, waits_for: List[concurrent.futures.Future]) -> bool:
+            # `result()` relève l'exception d'une étape amont ; False : étape amont en échec ou annulée
+            if not all([future.result() for future in waits_for]):
+                print(f"Étape {i}: {step.name} annulée (une étape dont elle dépend a échoué).")
+                return False
+            return self._run_step(i, step, incremental)
+
+        # Un thread par étape : une étape en attente de ses dépendances ne bloque pas les autres.
+        # Redirection des logs entrée une fois ici, pas par chaque thread d'étape
+        with _redirect_logging(), concurrent.futures.ThreadPoolExecutor(max_workers=len(steps_to_do)) as executor:
+            futures: List[concurrent.futures.Future] = []
+            for offset, (step, deps) in enumerate(zip(steps_to_do, dependencies)):
+                futures.append(executor.submit(run_step, from_step_index + offset, step,
+                                               [futures[d] for d in deps]))
+            # Première erreur relevée (dans l'ordre des étapes) une fois toutes les étapes terminées
+            return [step.name for step, future in zip(steps_to_do, futures) if not future.result()]
+
+    def run_pipelined(self, from_step_index: int = 0, queue_size: int = 32) -> bool:
+        """Exécute les étapes en même temps, au fil de l'eau : chaque sortie d'une étape est transmise
+        à l'étape suivante dès qu'elle est écrite (file bornée entre deux étapes, un thread par étape).
+        L'étape t+1 traite l'élément i pendant que l'étape t traite l'élément i+1 : le temps total tend
+        vers celui de l'étape la plus lente au lieu de la somme des étapes.
+
+        Chaque étape après la première doit être en mode 'one_input', lire un seul dossier d'entrée
+        qui est un dossier de sortie de l'étape précédente, sans `sample_k` ni `batch_size`.
+        Elle ne reçoit que les sorties produites pendant ce run : les éléments sautés en amont
+        (déjà à jour) ne lui sont pas transmis.
+        Renvoie True si toutes les étapes se sont terminées sans erreur ; les étapes en échec sont
+        signalées à la fin, comme dans `run`.
+
+        Args:
+            from_step_index (int): Index de la première étape à exécuter.
+            queue_size (int): Nombre maximal d'éléments en attente entre deux étapes (limite la mémoire
+                et l'avance d'une étape rapide sur la suivante).
+        """
+        if from_step_index < 0 or from_step_index >= len(self.steps):
+            raise IndexError(f"Invalid start index {from_step_index}. Pipeline has {len(self.steps)} steps.")
+        steps_to_do = self.steps[from_step_index:]
+        for producer, consumer in zip(steps_to_do, steps_to_do[1:]):
+            if not (consumer.pairing_method == 'one_input' and len(consumer.input_paths) == 1
+                    and consumer.input_paths[0] in producer.output_paths
+                    and consumer.batch_size == 1 and not consumer.sample_k):
+                raise ValueError(f"L'étape '{consumer.name}' ne peut pas être exécutée au fil de l'eau après "
+                                 f"'{producer.name}' (mode 'one_input' sur un dossier de sortie de l'étape précédente requis).")
+        self._plan_memory_handoff([])  # pas de transmission en mémoire : les fichiers transmis sont écrits
+        self._prepare_output_dirs(steps_to_do)
+
+        last = len(steps_to_do) - 1
+        queues = [queue.Queue(maxsize=queue_size) for _ in range(last)]
+
+        def forward(output_path: Path, out_queue: queue.Queue, consumer: ProcessingStep) -> None:
+            # Seuls les fichiers du dossier lu par l'étape suivante (et de ses extensions) lui sont transmis
+            if output_path.parent == consumer.input_paths[0] and (
+                    not consumer.extensions or output_path.name.lower().endswith(consumer.extensions)):
+                out_queue.put((output_path,))
+
+        def run_stage(offset: int, step: ProcessingStep) -> bool:
+            inputs = iter(queues[offset - 1].get, None) if offset else None  # None : fin de l'étape précédente
+            emit = (functools.partial(forward, out_queue=queues[offset], consumer=steps_to_do[offset + 1])
+                    if offset < last else None)
+            print(f"Running étape {from_step_index + offset}: {step.name}")
+            try:
+                return step._run_stream(inputs, emit, position=offset)
+            finally:
+                if offset < last:
+                    queues[offset].put(None)
+                if inputs is not None:
+                    # Étape interrompue : la file amont est vidée pour ne pas bloquer l'étape précédente
+                    collections.deque(inputs, maxlen=0)
+
+        # Redirection des logs entrée une fois ici, pas par chaque thread d'étape
+        with _redirect_logging(), concurrent.futures.ThreadPoolExecutor(max_workers=len(steps_to_do)) as executor:
+            futures = [executor.submit(run_stage, offset, step) for offset, step in enumerate(steps_to_do)]
+            # `result()` relève l'exception d'une étape une fois toutes les étapes terminées
+            failed_steps = [step.name for step, future in zip(steps_to_do, futures) if not future.result()]
+        if failed_steps:
+            logger.error("Pipeline : étape(s) en échec ou annulée(s) : %s", ", ".join(failed_steps))
+        return not failed_steps
+
+    def run(self, from_step_index: int = 0, only_one: bool = False, incremental: bool = False,
+            parallel_steps: bool = False) -> bool:
+        """Exécute les étapes du pipeline à partir de `from_step_index`.
+        Renvoie True si toutes les étapes se sont terminées sans erreur ; les étapes en échec
+        (ou annulées) sont signalées à la fin.
+
+        Args:
+            from_step_index (int): Index de la première étape à exécuter.
+            only_one (bool): N'exécute que l'étape `from_step_index`.
+            incremental (bool): Saute les étapes déjà exécutées sans erreur avec les mêmes options et les mêmes
+                fichiers d'entrée (voir `_run_step`). Une empreinte `.<nom de l'étape>-<hash>.cache_key` est enregistrée
+                à côté du premier dossier de sortie ; la supprimer force la réexécution de l'étape.
+            parallel_steps (bool): Exécute en même temps les étapes sans dépendance entre elles
+                (branches indépendantes), d'après le recouvrement de leurs dossiers d'entrée/sortie.
+                Les affichages des étapes simultanées s'entremêlent. Une étape dont une dépendance
+                a échoué n'est pas exécutée.
+        """
         # TODO: vérifier si un seul des dossiers d'output des étapes à run n'est pas vide => ne run pas
         # évite les runs par accident
         # cette vérification ne sera pas faite sur les step.run() pour permettre d'écraser
@@ -560,10 +1904,17 @@ class ProcessingPipeline:
             raise IndexError(f"Invalid start index {from_step_index}. Pipeline has {len(self.steps)} steps.")
         
         steps_to_do = [self.steps[from_step_index]] if only_one else self.steps[from_step_index:]
-        
-        for i, step in enumerate(steps_to_do, start=from_step_index):
-            print(f"Running étape {i}: {step.name}")
-            step.run()
+        self._plan_memory_handoff(steps_to_do)
+        self._prepare_output_dirs(steps_to_do)
+
+        if parallel_steps and len(steps_to_do) > 1:
+            failed_steps = self._run_steps_concurrently(steps_to_do, from_step_index, incremental)
+        else:
+            failed_steps = [step.name for i, step in enumerate(steps_to_do, start=from_step_index)
+                            if not self._run_step(i, step, incremental)]
+        if failed_steps:
+            logger.error("Pipeline : étape(s) en échec ou annulée(s) : %s", ", ".join(failed_steps))
+        return not failed_steps
 
 
 class PathJSONEncoder(json.JSONEncoder):
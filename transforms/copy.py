@@ -1,8 +1,12 @@
+import logging
 import shutil
 from pathlib import Path
 from typing import Any, List, Optional, Tuple
 from image_processor_pipeline.utils.utils import _validate_dirs
 
+logger = logging.getLogger(__name__)
+
+
 def copy_img_with_labels(
     input_image_path: Path, 
     input_label_path: Path,
@@ -22,10 +26,10 @@ def copy_img_with_labels(
         return [Path(img_out), Path(lbl_out)]
     
     except IOError as io:
-        print(f"Impossible de copier le fichier : {io}")
+        logger.error("Impossible de copier le fichier : %s", io)
         return None
     except Exception as e:
-        print(f"Autre erreur : {e}")
+        logger.error("Autre erreur : %s", e)
         return None
     
 def copy_files(
@@ -31,7 +31,7 @@ def _load_image(filepath: Path) -> np.ndarray:
     """
     if not filepath.isfile():
         raise FileNotFoundError(f"Image non trouvée: {filepath}")
-    img = cv2.imread(str(filepath))
+    img = utils.read_image(filepath, cv2.IMREAD_COLOR)
     if img is None:
         raise IOError(f"Impossible de charger l'image {filepath.name} via OpenCV.")
     return img
@@ -92,13 +92,12 @@ def _save_crop_files(
         Si l'image ne peut être écrite.
     """
     classes, bboxes = labels
-    if not cv2.imwrite(str(img_out), img):
-        raise IOError(f"Échec écriture de l'image : {img_out}")
+    utils._imwrite(img_out, img)
     
-    with open(label_out, 'w', encoding='utf-8') as f:
-        for cls_id, box in zip(classes, bboxes):
-            cx, cy, w, h = box
-            f.write(f"{cls_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+    utils._write_label_file(label_out, "".join(
+        f"{cls_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n"
+        for cls_id, (cx, cy, w, h) in zip(classes, bboxes)
+    ))
 
 
 def process_square_crop_around_bbox(
@@ -106,6 +105,7 @@ def process_square_crop_around_bbox(
     input_label_path: Path,
     output_dirs: List[Path],
     # options utiles
+    writer: Optional[Any] = None,
     **options: Any # Accepter d'autres options non utilisées
 ) -> Optional[List[Path]]: # Retourne une liste de 2 Path (image, label) ou None
     """
@@ -122,6 +122,9 @@ def process_square_crop_around_bbox(
         Chemin du fichier de labels YOLO.
     output_dirs : List[Path]
         [répertoire images, répertoire labels].
+    writer : BackgroundWriter, optional
+        Fourni par le pipeline quand l'étape a `async_writes=True` : la sauvegarde
+        de l'image et du label est confiée à son thread, par défaut None.
     **options : Any
         Accepte d'autres options (non utilisées ici).
 
@@ -219,7 +222,11 @@ def process_square_crop_around_bbox(
     # --- 7. Sauvegarde Image et Label ---
     img_output_path = image_target_dir / input_image_path.name
     label_output_path = label_target_dir / input_label_path.name
-    _save_crop_files(cropped_image, (new_class_ids, new_bboxes), img_output_path, label_output_path)
+    if writer is not None:
+        # Écriture différée : le crop n'est plus modifié ici, pas besoin de copie
+        writer.submit(_save_crop_files, cropped_image, (new_class_ids, new_bboxes), img_output_path, label_output_path)
+    else:
+        _save_crop_files(cropped_image, (new_class_ids, new_bboxes), img_output_path, label_output_path)
 
     return [img_output_path, label_output_path]
 
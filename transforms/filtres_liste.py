@@ -1,8 +1,11 @@
+import logging
 import cv2
 import numpy as np
 from pathlib import Path
 from typing import Any, List, Tuple, Optional
-from image_processor_pipeline.utils.utils import _validate_dirs 
+from image_processor_pipeline.utils.utils import _validate_dirs, _imwrite_params
+
+logger = logging.getLogger(__name__)
 
 
 def _rescale_filter(filter_tuple: Tuple[int, int, int, int, int, int], use_gimp_scale: bool = False):
@@ -21,9 +24,9 @@ def _rescale_filter(filter_tuple: Tuple[int, int, int, int, int, int], use_gimp_
         if any(h > 180 for h in [min_H, max_H]):
             raise ValueError(f"Valeur(s) H ({min_H} - {max_H}) du filtre HSV au format OpenCV non conforme")
         if all(val <= 100 for val in [min_S, min_V, max_S, max_V]):
-            print(f"Warning : aucune des valeurs S et V du filtre HSV au dessus de 100. ({min_S}, {min_V}, {max_S}, {max_V})."
-                  "Vérifiez que votre filtre est au format OpenCV (0-180, 0-255, 0-255)"
-                  "Non-bloquant, poursuite du traitement...")
+            logger.warning("Warning : aucune des valeurs S et V du filtre HSV au dessus de 100. (%s, %s, %s, %s). "
+                           "Vérifiez que votre filtre est au format OpenCV (0-180, 0-255, 0-255). "
+                           "Non-bloquant, poursuite du traitement...", min_S, min_V, max_S, max_V)
         return filter_tuple
     
     if any(sv > 100 for sv in [min_S, min_V, max_S, max_V]):
@@ -45,6 +48,7 @@ def process_images_with_color_masks(
     zones: List[Tuple[int, int, int, int] | None] | None = None,
     use_gimp_scale: bool = False,
     output_prefix: str = "",
+    png_compression: int = 1,
     **options: Any
 ) -> Optional[Path]:
     """
@@ -67,6 +71,8 @@ def process_images_with_color_masks(
             par défaut (False), considère que les valeurs sont au format d'OpenCV
         output_prefix: Un préfixe optionnel à ajouter au nom de chaque fichier de sortie.
                        Par exemple, "prefix_".
+        png_compression: Niveau de compression du PNG de sortie (0-9). 1 (défaut) privilégie la vitesse
+            d'écriture pour les étapes intermédiaires, 6-9 des fichiers plus petits pour les sorties finales.
     """
     # --- 1. Vérification des arguments et Setup ---
     output_dir = _validate_dirs(output_dirs, nb_dirs=1)
@@ -139,13 +145,13 @@ def process_images_with_color_masks(
     output_path = output_dir / output_filename
 
     try:
-        success = cv2.imwrite(output_path, result_with_alpha)
+        success = cv2.imwrite(str(output_path), result_with_alpha, _imwrite_params(output_path, png_compression))
         if success:
             return output_path
         else: 
             raise RuntimeError(f"Échec de sauvegarde (imwrite a retrouné False) pour {output_filename}")
     except Exception as e_save:
-        print(f"Erreur lors de la sauvegarde de {output_path}: {e_save}")
+        logger.error("Erreur lors de la sauvegarde de %s: %s", output_path, e_save)
         return None
 
 # --- Exemples d'utilisation ---
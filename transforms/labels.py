@@ -1,8 +1,11 @@
+import logging
 from pathlib import Path
 import shutil
 import tempfile
 from typing import Any, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 
 def change_label_class(input_path: Path,
                        output_dirs: List[Path],
@@ -59,7 +62,7 @@ def change_label_class(input_path: Path,
                 out_file.write(f"{new_line}\n")
         return output_path
     except Exception as e:
-        print(f"Problème : {e}")
+        logger.error("Problème : %s", e)
         # suppression du nouveau fichier
         if output_path.exists(): output_path.unlink()
         return None
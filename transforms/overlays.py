@@ -1,5 +1,9 @@
+import logging
+import os
 import random
 import math
+import threading
+from collections import OrderedDict
 from pathlib import Path
 import numpy as np
 from image_processor_pipeline.utils import utils
@@ -9,6 +13,11 @@ from ultralytics.utils.ops import xyxy2xywhn
 from deprecated import deprecated
 from icecream import ic
 
+logger = logging.getLogger(__name__)
+
+# Nom du fichier de labels unique écrit avec `aggregate_labels=True`
+AGGREGATED_LABELS_NAME = "labels.jsonl"
+
 
 def _convert_to_yolo_bbox(img_width: int, img_height: int, box: Tuple[int, int, int, int]) -> Tuple[float, float, float, float]:
     if img_width <= 0 or img_height <= 0:
@@ -21,6 +30,77 @@ def _convert_to_yolo_bbox(img_width: int, img_height: int, box: Tuple[int, int,
     height = (box[3] - box[1]) * dh
     return x_center, y_center, width, height
 
+# Fonds décodés (RGB), du moins au plus récemment utilisé, par (chemin, st_mtime_ns). Un cache par processus.
+_background_cache: "OrderedDict[Tuple[Path, int], Image.Image]" = OrderedDict()
+_background_cache_lock = threading.Lock()
+# Clés préchargées par `preload_backgrounds` : jamais évincées par le LRU
+_pinned_backgrounds: set = set()
+
+
+def _load_background(background_path: Path, cache_size: int = 0, pin: bool = False) -> Image.Image:
+    """Décode un fond en RGB une seule fois tant qu'il reste dans le cache LRU (`cache_size` fonds, 0 par défaut :
+    seuls les fonds déjà en cache, ex: `preload_backgrounds`, sont réutilisés).
+
+    En mode 'modulo' la 2e liste est parcourue en boucle : un fond revient tous les `len(backgrounds)` éléments,
+    le cache doit donc pouvoir tous les contenir pour être utile (sinon il est vidé avant la réutilisation).
+    Chaque fond en cache occupe sa taille décodée (largeur x hauteur x 3 octets) dans *chaque* processus.
+    La clé inclut la date de modification : un fond réécrit sur le disque est relu.
+    `pin` (préchargement) : le fond est gardé hors du décompte LRU, quel que soit `cache_size`.
+    L'image renvoyée est partagée, ne pas la modifier (travailler sur une copie).
+    """
+    key = (background_path, os.stat(background_path).st_mtime_ns)  # FileNotFoundError si absent
+    with _background_cache_lock:
+        background = _background_cache.get(key)
+        if background is not None:
+            _background_cache.move_to_end(key)
+            return background
+
+    # Décodage hors verrou (les autres threads ne sont pas bloqués)
+    # Assurer RGB pour sortie JPG/JPEG (convert charge les pixels, le fichier est refermé)
+    background = Image.open(background_path).convert('RGB')
+    if cache_size > 0 or pin:
+        with _background_cache_lock:
+            _background_cache[key] = background
+            if pin:
+                _pinned_backgrounds.add(key)
+            # Éviction des moins récemment utilisés, fonds préchargés exclus
+            excess = len(_background_cache) - len(_pinned_backgrounds) - cache_size
+            if excess > 0:
+                for old_key in [k for k in _background_cache if k not in _pinned_backgrounds][:excess]:
+                    del _background_cache[old_key]
+    return background
+
+
+def preload_backgrounds(backgrounds: Path | List[Path], cache_size: Optional[int] = None) -> None:
+    """Décode à l'avance des fonds dans le cache (au plus `cache_size`, par défaut tous).
+
+    Prévu pour l'option `warmup` d'une étape parallèle, ex :
+    `warmup=functools.partial(preload_backgrounds, Path('fonds'))`. Appelé dans le processus principal
+    avant la création du pool, les workers créés par 'fork' héritent des fonds décodés ;
+    sinon (spawn) il est exécuté une fois par worker à son démarrage.
+
+    Parameters
+    ----------
+    backgrounds : Path | List[Path]
+        Dossier des fonds, ou liste de chemins.
+    cache_size : int, optional
+        Nombre maximal de fonds préchargés, par défaut tous ceux fournis. Les fonds préchargés restent
+        en cache (hors `bg_cache_size`, même à 0) : ne précharger que ce que la mémoire des workers permet.
+    """
+    if isinstance(backgrounds, Path) and backgrounds.is_dir():
+        # scandir : type d'entrée lu dans le DirEntry, pas de stat() par fichier
+        with os.scandir(backgrounds) as it:
+            backgrounds = [Path(entry.path) for entry in sorted(it, key=lambda e: e.name)
+                           if entry.is_file(follow_symlinks=False)]
+    backgrounds = list(backgrounds)
+    cache_size = len(backgrounds) if cache_size is None else cache_size
+    for background_path in backgrounds[:cache_size]:
+        try:
+            _load_background(background_path, pin=True)
+        except Exception as e:  # fichier illisible : signalé plus tard, lors du traitement de la paire
+            logger.warning("Avertissement [Préchargement]: fond %s ignoré : %s", background_path.name, e)
+
+
 def paste_overlay_onto_background(
     overlay_path: Path,
     background_path: Path,
@@ -30,6 +110,9 @@ def paste_overlay_onto_background(
     yolo_class_id: int = 0,
     scale_min: float = 0.15,
     scale_max: float = 0.30,
+    bg_cache_size: int = 0,
+    aggregate_labels: bool = False,
+    writer: Optional[Any] = None,
     **options: Any # Accepter d'autres options non utilisées
     # TODO: ajouter une option qui enregistre les informations d'appariement, un JSON avec overlay_name, bg_name, bbox, diag_ratio
 ) -> Optional[List[Path]]: # Retourne une liste de 2 Path (image, label) ou None
@@ -61,13 +144,26 @@ def paste_overlay_onto_background(
     scale_max : float, optional
         Ratio maximal cible de la diagonale de l'overlay par rapport à la
         diagonale de l'image de fond (ex: 0.30 pour 30%), par défaut 0.30.
+    bg_cache_size : int, optional
+        Nombre de fonds décodés gardés en mémoire (LRU) par processus, par défaut 0 (désactivé).
+        Idéalement = nombre de fonds en mode 'modulo' (sinon le cache est vidé avant réutilisation) ;
+        attention à la mémoire : chaque fond occupe sa taille décodée dans chaque worker.
+    aggregate_labels : bool, optional
+        Si True, les labels sont ajoutés à un unique `labels.jsonl` du dossier des labels
+        (une ligne `{"image": ..., "label": ...}` par image) au lieu d'un `.txt` YOLO par image.
+        Le fichier est complété à chaque exécution : le supprimer avant de régénérer. Par défaut False.
+    writer : BackgroundWriter, optional
+        Fourni par le pipeline quand l'étape a `async_writes=True` : la sauvegarde
+        de l'image et du label est alors confiée à son thread (les erreurs
+        d'écriture sont remontées à la fin de l'étape), par défaut None.
     **options : Any
         Arguments supplémentaires non utilisés par cette fonction.
 
     Returns
     -------
     Optional[List[Path]]
-        Une liste contenant deux `Path` objets : le chemin vers l'image sauvegardée et le chemin vers le fichier label sauvegardé.  
+        Une liste contenant deux `Path` objets : le chemin vers l'image sauvegardée et le chemin vers le fichier label sauvegardé  
+        (seulement l'image avec `aggregate_labels=True`).  
         Retourne `None` en cas d'erreur (ex: fichier non trouvé,
         dimensions invalides, impossible de placer l'overlay, échec de sauvegarde).
     
@@ -84,20 +180,20 @@ def paste_overlay_onto_background(
         if overlay.mode != 'RGBA':
             overlay = overlay.convert('RGBA')
         
-        # Assurer RGB pour sortie JPG/JPEG
-        background = Image.open(background_path).convert('RGB')
+        # Fond décodé en cache (copié avant collage, voir étape 5)
+        background = _load_background(background_path, bg_cache_size)
         
     except FileNotFoundError as fnf:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Fichier non trouvé: {fnf}")
+        logger.error("Erreur [%s + %s]: Fichier non trouvé: %s", overlay_path.name, background_path.name, fnf)
         return None
     except UnidentifiedImageError as uie:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Impossible d'ouvrir l'image {uie}")
+        logger.error("Erreur [%s + %s]: Impossible d'ouvrir l'image %s", overlay_path.name, background_path.name, uie)
         return None
     except TypeError as te:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Type d'image invalide : {te}")
+        logger.error("Erreur [%s + %s]: Type d'image invalide : %s", overlay_path.name, background_path.name, te)
         return None
     except Exception as e:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Échec lecture fichiers: {e}")
+        logger.error("Erreur [%s + %s]: Échec lecture fichiers: %s", overlay_path.name, background_path.name, e)
         return None
 
     # --- 3. Calculer taille de l'overlay ---
@@ -149,11 +245,11 @@ def paste_overlay_onto_background(
         yolo_label_str = f"{yolo_class_id} {cx:.6f} {cy:.6f} {w_norm:.6f} {h_norm:.6f}"
 
     except ValueError as ve:
-        print(f"Erreur de valeur [{overlay_path.name} + {background_path.name}]: {ve}")
+        logger.error("Erreur de valeur [%s + %s]: %s", overlay_path.name, background_path.name, ve)
         return None
     except Exception as e:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: "
-              f"Échec pendant le processus de superposition: {e}")
+        logger.error("Erreur [%s + %s]: Échec pendant le processus de superposition: %s",
+                     overlay_path.name, background_path.name, e)
         # import traceback
         # traceback.print_exc() # Pour debug plus détaillé
         return None
@@ -163,30 +259,94 @@ def paste_overlay_onto_background(
 
     # Nom basé sur l'overlay, avec préfixe
     img_output_path = image_target_dir / f"{overlay_path.stem}{background_path.suffix}"
-    label_output_path = label_target_dir / f"{overlay_path.stem}.txt"
+    if aggregate_labels:
+        # Fichier partagé par toutes les images : une ligne ajoutée, pas de fichier par image
+        label_output_path = label_target_dir / AGGREGATED_LABELS_NAME
+        save_label, label_args = utils._append_label_line, (label_output_path, img_output_path.name, yolo_label_str)
+    else:
+        label_output_path = label_target_dir / f"{overlay_path.stem}.txt"
+        save_label, label_args = utils._write_label_file, (label_output_path, yolo_label_str)
+
+    if writer is not None:
+        # Écriture différée : l'image composite n'est plus modifiée ici, pas besoin de copie
+        writer.submit(utils._save_pil_image, composite_image, img_output_path)
+        writer.submit(save_label, *label_args)
+        return [img_output_path] if aggregate_labels else [img_output_path, label_output_path]
     
     try:
-        composite_image.save(img_output_path)
+        utils._save_pil_image(composite_image, img_output_path)
         saved_paths.append(img_output_path)
         
-        with open(label_output_path, 'w', encoding='utf-8') as f:
-            f.write(yolo_label_str)
-        saved_paths.append(label_output_path)
+        save_label(*label_args)
+        if not aggregate_labels:  # le fichier agrégé ne doit pas être supprimé en cas d'échec
+            saved_paths.append(label_output_path)
         # --- 7. Retourner la liste des DEUX chemins ---
         return saved_paths
 
     except Exception as e_save:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Échec lors de la sauvegarde: {e_save}")
+        logger.error("Erreur [%s + %s]: Échec lors de la sauvegarde: %s", overlay_path.name, background_path.name, e_save)
         # import traceback
         # traceback.print_exc()
         for p in saved_paths:
             try:
                 if p.exists(): p.unlink()
             except OSError:
-                print(f"Avertissement: Impossible de nettoyer le fichier partiellement créé {p}")
+                logger.warning("Avertissement: Impossible de nettoyer le fichier partiellement créé %s", p)
         return None
 
 
+def _predict_overlay_outputs(overlay_path: Path, background_path: Path, output_dirs: List[Path], **options: Any) -> List[Path]:
+    """Chemins (image, label) que produirait `paste_overlay_onto_background`, sans rien ouvrir."""
+    image_target_dir, label_target_dir = utils._validate_dirs(output_dirs, nb_dirs=2)
+    if options.get('aggregate_labels'):
+        # Le fichier agrégé existe dès la première image : seule l'image indique si la paire est faite
+        return [image_target_dir / f"{overlay_path.stem}{background_path.suffix}"]
+    return [image_target_dir / f"{overlay_path.stem}{background_path.suffix}",
+            label_target_dir / f"{overlay_path.stem}.txt"]
+
+# Permet `ProcessingStep(..., overwrite=False)` de sauter les paires déjà produites
+paste_overlay_onto_background.predict_outputs = _predict_overlay_outputs
+# Fichier de labels agrégé (`aggregate_labels`) fermé en fin d'étape
+paste_overlay_onto_background.on_step_end = utils.close_label_sinks
+
+
+def paste_overlay_batch(
+    input_batch: Tuple[Tuple[Path, Path], ...],
+    output_dirs: List[Path],
+    **options: Any
+) -> List[Optional[List[Path]]]:
+    """
+    Variante par lots de `paste_overlay_onto_background`, pour une étape créée avec `batch_size` > 1 :
+    un seul appel (et un seul aller-retour vers le pool de processus) par lot de paires.
+
+    Les paires du lot sont traitées regroupées par fond : chaque fond est décodé au plus une fois
+    par lot (cache d'au moins un fond), même si le cache LRU (`bg_cache_size`) est plus petit que le nombre de fonds.
+
+    Parameters
+    ----------
+    input_batch : Tuple[Tuple[Path, Path], ...]
+        Paires (overlay, fond) du lot.
+    output_dirs : List[Path]
+        [répertoire images, répertoire labels].
+    **options : Any
+        Options transmises à `paste_overlay_onto_background`.
+
+    Returns
+    -------
+    List[Optional[List[Path]]]
+        Le retour de `paste_overlay_onto_background` pour chaque paire, dans l'ordre du lot.
+    """
+    results: List[Optional[List[Path]]] = [None] * len(input_batch)
+    # Au moins le fond courant en cache : les paires consécutives d'un même fond ne le redécodent pas
+    options["bg_cache_size"] = max(1, options.get("bg_cache_size", 0))
+    for i in sorted(range(len(input_batch)), key=lambda i: input_batch[i][1]):
+        overlay_path, background_path = input_batch[i]
+        results[i] = paste_overlay_onto_background(overlay_path, background_path, output_dirs, **options)
+    return results
+
+paste_overlay_batch.on_step_end = utils.close_label_sinks
+
+
 @deprecated(reason="utiliser `paste_overlay_onto_background` à la place.")
 def process_overlay_pair(
     overlay_path: Path,
@@ -198,6 +358,7 @@ def process_overlay_pair(
     min_scale: float = 0.1,
     max_scale: float = 0.35,
     max_placement_attempts: int = 10, # Nombre max d'essais pour placer l'overlay
+    bg_cache_size: int = 0, # Fonds décodés gardés en mémoire (LRU), comme `paste_overlay_onto_background`
     **options: Any # Accepter d'autres options non utilisées
 ) -> Optional[List[Path]]: # Retourne une liste de 2 Path (image, label) ou None
     """
@@ -215,6 +376,8 @@ def process_overlay_pair(
         output_prefix (str): Préfixe pour les noms des fichiers de sortie.
         output_format_image (str): Format de sauvegarde PIL pour l'image (ex: JPEG, PNG).
         max_placement_attempts (int): Nombre maximum de tentatives pour redimensionner/placer.
+        bg_cache_size (int): Nombre de fonds décodés gardés en mémoire (LRU) par processus, 0 pour désactiver
+                             (voir `paste_overlay_onto_background`).
         **options (Any): Accepte d'autres options.
 
     Returns:
@@ -224,8 +387,8 @@ def process_overlay_pair(
     """
     # --- 1. Vérifications Préliminaires ---
     if len(output_dirs) < 2:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: "
-              f"Au moins 2 dossiers de sortie sont requis (images, labels), {len(output_dirs)} fourni(s).")
+        logger.error("Erreur [%s + %s]: Au moins 2 dossiers de sortie sont requis (images, labels), %s fourni(s).",
+                     overlay_path.name, background_path.name, len(output_dirs))
         return None
     image_target_dir = output_dirs[0]
     label_target_dir = output_dirs[1]
@@ -235,22 +398,24 @@ def process_overlay_pair(
         overlay = Image.open(overlay_path)
         if overlay.mode != 'RGBA':
             overlay = overlay.convert('RGBA')
-        background = Image.open(background_path).convert('RGB') # Assurer RGB pour sortie JPG/JPEG
+        # Fond décodé en cache (RGB) si `bg_cache_size` > 0 ou préchargé, copié avant chaque collage plus bas
+        background = _load_background(background_path, bg_cache_size)
 
     except FileNotFoundError as e:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Fichier non trouvé: {e}")
+        logger.error("Erreur [%s + %s]: Fichier non trouvé: %s", overlay_path.name, background_path.name, e)
         return None
     except UnidentifiedImageError as e:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Impossible d'ouvrir l'image {e}")
+        logger.error("Erreur [%s + %s]: Impossible d'ouvrir l'image %s", overlay_path.name, background_path.name, e)
         return None
     except Exception as e:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Échec lecture fichiers: {e}")
+        logger.error("Erreur [%s + %s]: Échec lecture fichiers: %s", overlay_path.name, background_path.name, e)
         return None
 
     # --- 3. Calculer taille et position (avec tentatives) ---
     bg_width, bg_height = background.size
     if bg_width <= 0 or bg_height <= 0:
-        print(f"Avertissement [OverlayPair]: Image de fond invalide {background_path.name} ({bg_width}x{bg_height}). Ignoré.")
+        logger.warning("Avertissement [OverlayPair]: Image de fond invalide %s (%sx%s). Ignoré.",
+                       background_path.name, bg_width, bg_height)
         return None
 
     composite_image: Optional[Image.Image] = None
@@ -262,7 +427,7 @@ def process_overlay_pair(
         base_size = min(bg_width, bg_height) * scale
         ov_width, ov_height = overlay.size
         if ov_width <=0 or ov_height <=0: # Vérifier overlay valide
-             print(f"Erreur [{overlay_path.name}]: Overlay a des dimensions invalides {ov_width}x{ov_height}.")
+             logger.error("Erreur [%s]: Overlay a des dimensions invalides %sx%s.", overlay_path.name, ov_width, ov_height)
              return None # Erreur fatale pour cette paire
 
         # Calcul ratio basé sur dimension overlay
@@ -305,17 +470,18 @@ def process_overlay_pair(
                 break # Sortir de la boucle while/for attempts
 
             except ValueError as e_yolo: # Erreur spécifique de _convert_to_yolo_bbox
-                 print(f"Erreur [{overlay_path.name}]: Erreur conversion YOLO: {e_yolo}")
+                 logger.error("Erreur [%s]: Erreur conversion YOLO: %s", overlay_path.name, e_yolo)
                  # C'est une erreur fatale pour cette paire, on ne peut pas générer de label
                  return None
             except Exception as e_paste:
                  # Erreur pendant resize ou paste
-                 print(f"Erreur [{overlay_path.name}]: Échec redim/collage tentative {attempt+1}: {e_paste}")
+                 logger.error("Erreur [%s]: Échec redim/collage tentative %s: %s", overlay_path.name, attempt+1, e_paste)
                  # Essayer à nouveau si possible
 
     # --- 4. Vérifier si le placement a réussi ---
     if composite_image is None or yolo_label_str is None:
-        print(f"Avertissement [OverlayPair]: Impossible de placer {overlay_path.name} sur {background_path.name} après {max_placement_attempts} tentatives.")
+        logger.warning("Avertissement [OverlayPair]: Impossible de placer %s sur %s après %s tentatives.",
+                       overlay_path.name, background_path.name, max_placement_attempts)
         return None
 
     # --- 5. Sauvegarde de l'image et du label ---
@@ -340,7 +506,7 @@ def process_overlay_pair(
         return saved_paths
 
     except Exception as e_save:
-        print(f"Erreur [{overlay_path.name} + {background_path.name}]: Échec lors de la sauvegarde: {e_save}")
+        logger.error("Erreur [%s + %s]: Échec lors de la sauvegarde: %s", overlay_path.name, background_path.name, e_save)
         import traceback
         traceback.print_exc()
         # Nettoyer les fichiers potentiellement créés partiellement ? Optionnel.
@@ -350,5 +516,5 @@ def process_overlay_pair(
             try:
                 if p.exists(): p.unlink()
             except OSError:
-                print(f"Avertissement: Impossible de nettoyer le fichier partiellement créé {p}")
+                logger.warning("Avertissement: Impossible de nettoyer le fichier partiellement créé %s", p)
         return None # Échec global si la sauvegarde d'un des deux échoue
\ No newline at end of file
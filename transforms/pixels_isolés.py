@@ -1,8 +1,11 @@
+import logging
 import cv2
 import numpy as np
 from pathlib import Path
 from typing import List
-from image_processor_pipeline.utils.utils import _validate_dirs
+from image_processor_pipeline.utils.utils import _validate_dirs, _imwrite_params
+
+logger = logging.getLogger(__name__)
 
 
 def keep_largest_component(
@@ -63,12 +66,12 @@ def keep_largest_component(
     output_path = output_dir / file.name
 
     try:
-        cv2.imwrite(str(output_path), cropped_image)
+        cv2.imwrite(str(output_path), cropped_image, _imwrite_params(output_path))
         # cropped_image.save(output_path)
         return output_path
     except Exception as e_save:
         # Erreur lors de l'écriture (permissions, disque plein, etc.)
-        print(f"Erreur [{file.name} - Symétrie]: Échec de sauvegarde pour {output_path.name}: {e_save}")
+        logger.error("Erreur [%s - Symétrie]: Échec de sauvegarde pour %s: %s", file.name, output_path.name, e_save)
         return None
     
 def _crop_fit(img: np.ndarray) -> np.ndarray:
@@ -1,7 +1,11 @@
+import logging
 from pathlib import Path
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import cv2
 from PIL import Image
+from image_processor_pipeline.utils import utils
+
+logger = logging.getLogger(__name__)
 
 
 def _compute_crop(value, total_length):
@@ -14,8 +18,13 @@ def crop_from_border(
         file: Path, 
         output_dirs: List[Path], 
         crop_margins: Tuple[float, float, float, float] = (0, 0, 0, 0),
+        loaded_inputs: Optional[Tuple[Any, ...]] = None,
+        return_arrays: bool = False,
         **options: Any
-    ) -> Optional[Path]:
+    ) -> Optional[Path | Dict[Path, Any]]:
+    """Rogne les bords d'une image JPG (marges en pixels, ou en fraction de la taille si < 1).
+    Avec `return_arrays` (étape `inmemory`, `saver=utils.save_array`), renvoie {chemin de sortie: image}
+    sans rien écrire : l'étape suivante reçoit le tableau directement."""
 
     output_dir = output_dirs[0]
 
@@ -25,8 +34,8 @@ def crop_from_border(
 
     crop_top, crop_bottom, crop_left, crop_right = crop_margins
 
-    # lecture de l'image
-    image = cv2.imread(str(file), cv2.IMREAD_UNCHANGED)
+    # lecture de l'image (déjà décodée par le `loader` de l'étape, dans un thread de prefetch, si fourni)
+    image = loaded_inputs[0] if loaded_inputs else cv2.imread(str(file), cv2.IMREAD_UNCHANGED)
     if image is None:
         raise FileNotFoundError(f"Impossible de charger l'image {file.name}.")
 
@@ -46,18 +55,21 @@ def crop_from_border(
     cropped_image = image[crop_top_px:height - crop_bottom_px, crop_left_px:width - crop_right_px]
 
     output_path = output_dir / file.name
+    if return_arrays:
+        return {output_path: cropped_image}
 
     try:
-        success = cv2.imwrite(str(output_path), cropped_image)
+        success = cv2.imwrite(str(output_path), cropped_image, utils._imwrite_params(output_path))
         if success:
             return output_path
         else:
             # L'écriture a échoué sans lever d'exception (rare mais possible)
-            print(f"Avertissement [{file.name} - Symétrie]: Échec de sauvegarde (imwrite a retourné False) pour {output_path.name}")
+            logger.warning("Avertissement [%s - Symétrie]: Échec de sauvegarde (imwrite a retourné False) pour %s",
+                           file.name, output_path.name)
             return None
     except Exception as e_save:
         # Erreur lors de l'écriture (permissions, disque plein, etc.)
-        print(f"Erreur [{file.name} - Symétrie]: Échec de sauvegarde pour {output_path.name}: {e_save}")
+        logger.error("Erreur [%s - Symétrie]: Échec de sauvegarde pour %s: %s", file.name, output_path.name, e_save)
         return None
 
 def fit_crop(
@@ -77,6 +89,6 @@ def fit_crop(
         new_image = image.crop(bbox)
     
     output_path = output_dir / image_path.name
-    new_image.save(output_path)
+    utils._save_pil_image(new_image, output_path)  # PNG/JPEG encodés par OpenCV
 
     return output_path
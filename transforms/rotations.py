@@ -1,7 +1,12 @@
+import logging
 import random
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Union # Ajout des types nécessaires
 from PIL import Image, UnidentifiedImageError # Garder PIL
+from image_processor_pipeline.utils import utils
+
+logger = logging.getLogger(__name__)
+
 
 def process_rotations(
     input_path: Path,
@@ -45,7 +50,7 @@ def process_rotations(
     """
     # --- 1. Vérifications Préliminaires ---
     if not output_dirs:
-        print(f"Erreur [{input_path.name} - Rotation]: Aucun dossier de sortie ('output_paths') fourni.")
+        logger.error("Erreur [%s - Rotation]: Aucun dossier de sortie ('output_paths') fourni.", input_path.name)
         return None
     target_dir = output_dirs[0]
 
@@ -54,13 +59,13 @@ def process_rotations(
         # Charger et convertir en RGBA pour gérer la transparence pendant la rotation
         img = Image.open(input_path).convert("RGBA")
     except FileNotFoundError:
-        print(f"Erreur [{input_path.name} - Rotation]: Fichier non trouvé.")
+        logger.error("Erreur [%s - Rotation]: Fichier non trouvé.", input_path.name)
         return None
     except UnidentifiedImageError:
-         print(f"Erreur [{input_path.name} - Rotation]: Impossible d'identifier ou d'ouvrir l'image (format invalide?).")
+         logger.error("Erreur [%s - Rotation]: Impossible d'identifier ou d'ouvrir l'image (format invalide?).", input_path.name)
          return None
     except Exception as e:
-        print(f"Erreur [{input_path.name} - Rotation]: Échec lors de la lecture du fichier: {e}")
+        logger.error("Erreur [%s - Rotation]: Échec lors de la lecture du fichier: %s", input_path.name, e)
         return None
 
     # --- 3. Génération et Sauvegarde ---
@@ -78,10 +83,11 @@ def process_rotations(
         output_filename_orig = f"{base_name}_{original_key}{out_suffix}"
         output_file_path_orig = target_dir / output_filename_orig
         try:
-            img.save(output_file_path_orig, format=output_format)
+            utils._save_pil_image(img, output_file_path_orig, format=output_format)  # PNG/JPEG encodés par OpenCV
             saved_files.append(output_file_path_orig)
         except Exception as e_save:
-            print(f"Erreur [{input_path.name} - Rotation]: Échec sauvegarde de l'original '{output_filename_orig}': {e_save}")
+            logger.error("Erreur [%s - Rotation]: Échec sauvegarde de l'original '%s': %s",
+                         input_path.name, output_filename_orig, e_save)
             # On continue même si l'original échoue
 
     # Générer et sauvegarder les rotations
@@ -102,10 +108,12 @@ def process_rotations(
                 if cropped.width > 0 and cropped.height > 0:
                     rotated_image = cropped
                 else:
-                    print(f"Avertissement [{input_path.name} - Rotation]: Recadrage après rotation {i+1} vide. Utilisation de l'image non recadrée.")
+                    logger.warning("Avertissement [%s - Rotation]: Recadrage après rotation %s vide. Utilisation de l'image non recadrée.",
+                                   input_path.name, i+1)
                     rotated_image = rotated
             else:
-                 print(f"Avertissement [{input_path.name} - Rotation]: Impossible d'obtenir BBox après rotation {i+1}. Utilisation de l'image non recadrée.")
+                 logger.warning("Avertissement [%s - Rotation]: Impossible d'obtenir BBox après rotation %s. Utilisation de l'image non recadrée.",
+                                input_path.name, i+1)
                  rotated_image = rotated
 
             # Si on a une image à sauvegarder
@@ -116,17 +124,19 @@ def process_rotations(
                 output_file_path_rot = target_dir / output_filename_rot
 
                 # Sauvegarde
-                rotated_image.save(output_file_path_rot, format=output_format)
+                utils._save_pil_image(rotated_image, output_file_path_rot, format=output_format)
                 saved_files.append(output_file_path_rot)
 
         except Exception as e_rot_save:
             # Attraper les erreurs pendant la rotation ou la sauvegarde de CETTE itération
-            print(f"Erreur [{input_path.name} - Rotation]: Échec lors de la génération/sauvegarde de la rotation {i+1} (angle {angle:.1f}°): {e_rot_save}")
+            logger.error("Erreur [%s - Rotation]: Échec lors de la génération/sauvegarde de la rotation %s (angle %.1f°): %s",
+                         input_path.name, i+1, angle, e_rot_save)
             # On continue avec la rotation suivante
 
     # --- 4. Retour ---
     if not saved_files:
-        print(f"Avertissement [{input_path.name} - Rotation]: Aucune image (originale ou rotation) n'a pu être sauvegardée.")
+        logger.warning("Avertissement [%s - Rotation]: Aucune image (originale ou rotation) n'a pu être sauvegardée.",
+                       input_path.name)
         return None
 
     # print(f"Info [{input_path.name} - Rotation]: {len(saved_files)} image(s) sauvegardée(s).")
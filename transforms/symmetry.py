@@ -1,9 +1,11 @@
+import os
 import cv2
 import random
 from pathlib import Path
-from typing import Any, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from ultralytics.data.utils import IMG_FORMATS
 from warnings import warn
+from image_processor_pipeline.utils import utils
 
 ALL_SYMS = ('o', 'h', 'v', 'hv')
 
@@ -16,8 +18,13 @@ def generate_symmetries(
     pool: Optional[List[Literal[*ALL_SYMS]]] = None,  # type: ignore
     choose_random: Optional[int] = None,
     include_original: bool = True,
+    png_compression: int = 1,
+    output_format: Optional[str] = None,
+    loaded_inputs: Optional[Tuple[Any, ...]] = None,
+    writer: Optional[Any] = None,
+    return_arrays: bool = False,
     **options: Any
-) -> Optional[List[Path]]:
+) -> Optional[List[Path] | Dict[Path, Any]]:
     """
     Génère les symétries d'une image :
     
@@ -65,14 +72,32 @@ def generate_symmetries(
         - Si True et `pool` ne contient pas 'o' (désiré)  
             choisi au hasard une orientation parmi pool et ajoute une copie originale.  
         Par défaut True  
+    png_compression : int, optional
+        Niveau de compression des sorties PNG (0-9). 1 (défaut) privilégie la vitesse d'écriture
+        pour les étapes intermédiaires, 6-9 des fichiers plus petits pour les sorties finales.
+    output_format : str, optional
+        Extension des fichiers de sortie (ex: '.png', '.npy'), par défaut celle de l'image d'entrée.
+        '.npy' enregistre les tableaux bruts sans encodage, pour une étape intermédiaire
+        (relus par `utils.read_image`).
+    loaded_inputs : Tuple, optional
+        Fourni par le pipeline quand l'étape a un `loader` (ex: `utils.read_image`) : l'image déjà
+        décodée par un thread de prefetch pendant le traitement de l'élément précédent, par défaut None.
+    writer : BackgroundWriter, optional
+        Fourni par le pipeline quand l'étape a `async_writes=True` : les symétries
+        sont encodées et écrites par son thread (les erreurs d'écriture sont remontées
+        à la fin de l'étape), par défaut None.
+    return_arrays : bool, optional
+        Pour une étape `inmemory` (avec `saver=utils.save_array`) : renvoie {chemin de sortie: image}
+        sans rien écrire, les symétries sont transmises telles quelles à l'étape suivante. Par défaut False.
     **options : Any
         Options supplémentaires (ignorées).
     
     Returns
     -------
-    Optional[List[Path]]
+    Optional[List[Path] | Dict[Path, np.ndarray]]
         Liste des chemins des fichiers sauvegardés, ou None si
         une erreur initiale se produit ou si aucune sauvegarde ne réussit.
+        Avec `return_arrays`, dict {chemin de sortie: image}.
 
     Raises
     ------
@@ -89,7 +114,7 @@ def generate_symmetries(
         raise ValueError(f"Erreur [{input_path.name} - Symétrie]: Aucun dossier de sortie ('output_dirs') fourni.")
     output_dir = output_dirs[0]
 
-    if input_path.suffix.lower()[1:] not in IMG_FORMATS:
+    if input_path.suffix.lower()[1:] not in IMG_FORMATS and input_path.suffix.lower() != '.npy':
         # Peut-être ouvrir à tout type d'image ?
         raise ValueError(f"Le fichier {input_path.name} n'est pas un format accepté par Yolo.")
 
@@ -106,7 +131,7 @@ def generate_symmetries(
         raise ValueError(f"[{input_path.name} - Symétrie] `choose_random` ({choose_random}) doit être >= 0. Aucune symétrie aléatoire générée.")
     
     # Lire l'image
-    image = cv2.imread(str(input_path), cv2.IMREAD_UNCHANGED)
+    image = loaded_inputs[0] if loaded_inputs else utils.read_image(input_path)
     if image is None:
         raise FileNotFoundError(f"[{input_path.name} - Symétrie] Impossible de charger l'image.")
     
@@ -127,23 +152,33 @@ def generate_symmetries(
 
     # Sauvegarde des images générées
     saved_files: List[Path] = []
+    # Dossier, nom et extension sont communs à toutes les symétries : chemins construits par concaténation
+    output_suffix = output_format or input_path.suffix
+    output_prefix = f"{os.fspath(output_dir)}{os.sep}{input_path.stem}_"
+    write_params = utils._imwrite_params(f"{output_prefix}{output_suffix}", png_compression)
+    arrays: Dict[Path, Any] = {}
     for sym in filter_:
         image_flip = sym_generators[sym](image)
 
-        output_filename = input_path.with_stem(f"{input_path.stem}_{sym}")
-        output_path = output_dir / output_filename.name
+        output_path = f"{output_prefix}{sym}{output_suffix}"
+
+        if return_arrays:
+            arrays[Path(output_path)] = image_flip
+            continue
+
+        if writer is not None:
+            # Chaque symétrie est un nouveau tableau (flip/copy) : rien à copier avant l'écriture différée
+            writer.submit(utils._imwrite, output_path, image_flip, write_params)
+            saved_files.append(Path(output_path))
+            continue
 
         try:
-            success = cv2.imwrite(str(output_path), image_flip)
-            if success:
-                saved_files.append(output_path)
-            else:
-                # L'écriture a échoué sans lever d'exception (rare, mais possible)
-                # jamais du coup ?
-                warn(f"Échec de sauvegarde de la symétrie '{sym}' pour {output_path.name}. Retour False depuis `.imwrite`")
+            # `_imwrite` lève une erreur si cv2.imwrite renvoie False, et gère les `.npy`
+            utils._imwrite(output_path, image_flip, write_params)
+            saved_files.append(Path(output_path))
         except Exception as e_save:
             # Erreur lors de l'écriture (permissions, disque plein, etc.)
-            warn(f"Erreur [{input_path.name} - Symétrie '{sym}']: Échec de sauvegarde pour {output_filename} : {e_save}.")
+            warn(f"Erreur [{input_path.name} - Symétrie '{sym}']: Échec de sauvegarde pour {os.path.basename(output_path)} : {e_save}.")
             # On continue d'essayer de sauvegarder les autres images
     
-    return saved_files
+    return arrays if return_arrays else saved_files
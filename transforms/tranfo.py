@@ -3,7 +3,7 @@ import shutil
 from pathlib import Path
 from PIL import Image, ImageEnhance, ImageFilter
 from typing import Any, List, Optional
-from image_processor_pipeline.utils.utils import _validate_dirs
+from image_processor_pipeline.utils.utils import _validate_dirs, _save_pil_image
 
 
 def enhance_image(
@@ -50,6 +50,6 @@ def enhance_image(
             b = b.point(lambda p: max(0, min(255, p * random.uniform(0.75, 1.25))))
             img = Image.merge("RGB", (r, g, b))
         
-        img.save(output_path)
+        _save_pil_image(img, output_path)  # PNG/JPEG encodés par OpenCV
     
     return output_path
\ No newline at end of file
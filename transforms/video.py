@@ -1,7 +1,9 @@
+import os
 import cv2
 from pathlib import Path
 from typing import Any, List, Optional
 from ultralytics.data.utils import VID_FORMATS
+from image_processor_pipeline.utils import utils
 
 def frame_extraction(
     video_path: Path,
@@ -32,6 +34,8 @@ def frame_extraction(
         raise ValueError(f"Fichier vidéo {video_path.suffix} non pris en charge." \
                          f"Format autorisés : {VID_FORMATS}")
     
+    # Préfixe des frames calculé une fois : une concaténation de str par frame au lieu d'un Path
+    frame_prefix = f"{os.fspath(output_dir)}{os.sep}{file_basename}-frame_"
     frame_count = 1
     success = True
     # Boucle sur chaque image de la vidéo
@@ -39,9 +43,7 @@ def frame_extraction(
         success, frame = cap.read()
         if success:
             # nom composé du basename (nom de classe) suivi du n° de frame
-            frame_name = f"{file_basename}-frame_{frame_count:04d}.jpg"
-            output_path = output_dir / frame_name
-            cv2.imwrite(str(output_path), frame)
+            utils._imwrite(f"{frame_prefix}{frame_count:04d}.jpg", frame)
             frame_count += 1
     
     cap.release()